@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+内容哈希和增量处理缓存（auto-images.py / auto-audio.py / auto-build.py / auto-serve.py /
+content_store.py 共用）
+
+衍生文件（图片尺寸、转码音频）按源文件哈希和处理参数缓存，清单保存在输出目录，
+源文件和参数都没有变化、输出文件也都还在时跳过。
+"""
+
+import os
+import glob
+import json
+import hashlib
+
+
+def hash_file(path):
+    """返回文件的 (sha256, 大小)"""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def load_manifest(path, section):
+    """读取清单；不存在或无法解析时返回只有空 section 的清单（全部重新处理）"""
+    if not os.path.exists(path):
+        return {section: {}}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠ 读取清单失败，将全部重新处理: {e}")
+        return {section: {}}
+
+
+def save_manifest(path, manifest):
+    """写入临时文件后原子替换，中断时不会留下不完整的清单"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def find_sources(source_dir, patterns):
+    """展开通配符，返回相对 source_dir 的文件路径（去重，保持顺序）"""
+    sources = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(os.path.join(source_dir, pattern))):
+            relative = os.path.relpath(path, source_dir).replace(os.sep, '/')
+            if os.path.isfile(path) and relative not in sources:
+                sources.append(relative)
+    return sources
+
+
+def is_cached(entry, digest, settings, output_dir, output_files):
+    """
+    哈希、参数一致且输出文件都在时跳过
+
+    Args:
+        entry: 清单中的旧条目，None表示没有处理过
+        digest / settings: 本次的源文件哈希和参数
+        output_dir: 输出目录
+        output_files: 函数，返回条目中的输出文件名
+    """
+    if not entry or entry.get("hash") != digest or entry.get("settings") != settings:
+        return False
+    return all(os.path.exists(os.path.join(output_dir, name)) for name in output_files(entry))
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+import shutil
+import fnmatch
+import argparse
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import asset_cache
+
+# 默认处理的音频（相对站点根目录的通配符）
+DEFAULT_SOURCES = [
+    "61-246-0001-*.mp3",
+    "beijing.ogg",
+    "ending.mp3",
+    "win.mp3",
+    "ai.mp3",
+]
+
+# 转码配置：课程录音按语音处理（单声道低码率），背景音乐和音效保留立体声
+PROFILES = {
+    "speech": {
+        "channels": 1,
+        "loudnorm": "loudnorm=I=-16:TP=-1.5:LRA=11",
+        "outputs": {
+            "opus": {"ext": ".ogg", "args": ["-c:a", "libopus", "-b:a", "24k",
+                                            "-application", "voip", "-ar", "48000"]},
+            "mp3": {"ext": ".mp3", "args": ["-c:a", "libmp3lame", "-b:a", "40k", "-ar", "24000"]},
+        },
+    },
+    "music": {
+        "channels": 2,
+        "loudnorm": "loudnorm=I=-18:TP=-1.5:LRA=11",
+        "outputs": {
+            "opus": {"ext": ".ogg", "args": ["-c:a", "libopus", "-b:a", "64k",
+                                            "-application", "audio", "-ar", "48000"]},
+            "mp3": {"ext": ".mp3", "args": ["-c:a", "libmp3lame", "-b:a", "96k", "-ar", "44100"]},
+        },
+    },
+}
+
+# 按文件名选择配置，未匹配的使用 music
+PROFILE_RULES = [
+    ("61-246-0001-*", "speech"),
+    ("ai.mp3", "speech"),
+]
+
+MANIFEST_NAME = "manifest.json"
+
+
+def profile_for(relative_path):
+    """根据文件名选择转码配置"""
+    name = os.path.basename(relative_path)
+    for pattern, profile in PROFILE_RULES:
+        if fnmatch.fnmatch(name, pattern):
+            return profile
+    return "music"
+
+
+def probe_duration(path):
+    """用 ffprobe 读取时长（秒），失败返回 None"""
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "json", path],
+        capture_output=True, text=True, encoding='utf-8'
+    )
+    if result.returncode != 0:
+        return None
+    try:
+        return round(float(json.loads(result.stdout)["format"]["duration"]), 3)
+    except (ValueError, KeyError):
+        return None
+
+
+def transcode(source_root, output_dir, relative_path, profile_name, formats):
+    """
+    把一个音频转码为各目标格式（在子进程中运行）
+    返回清单条目（不含哈希）
+    """
+    source = os.path.join(source_root, relative_path)
+    profile = PROFILES[profile_name]
+    stem = os.path.splitext(relative_path)[0].replace('/', '_')
+    outputs = {}
+
+    for name in formats:
+        spec = profile["outputs"][name]
+        filename = f"{stem}{spec['ext']}"
+        target = os.path.join(output_dir, filename)
+        tmp_target = os.path.join(output_dir, f".{stem}.tmp{spec['ext']}")
+        cmd = ["ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-y",
+               "-i", source, "-vn", "-map_metadata", "-1",
+               "-af", profile["loudnorm"], "-ac", str(profile["channels"])]
+        cmd += spec["args"] + [tmp_target]
+        result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8')
+        if result.returncode != 0:
+            if os.path.exists(tmp_target):
+                os.remove(tmp_target)
+            raise RuntimeError(result.stderr.strip() or f"ffmpeg 返回码 {result.returncode}")
+        os.replace(tmp_target, target)
+        outputs[name] = {"file": filename, "bytes": os.path.getsize(target)}
+
+    first_output = os.path.join(output_dir, next(iter(outputs.values()))["file"])
+    return {
+        "profile": profile_name,
+        "bytes": os.path.getsize(source),
+        "duration": probe_duration(first_output) or probe_duration(source),
+        "outputs": outputs,
+    }
+
+
+class AudioTranscoder:
+    def __init__(self, source_dir=None, output_dir=None, formats=None, base_url="", workers=None):
+        """
+        初始化音频批量转码工具
+
+        Args:
+            source_dir: 站点源码目录，None表示脚本所在目录
+            output_dir: 输出目录，None表示 <源码目录>/audio
+            formats: 输出格式列表（opus / mp3）
+            base_url: 写入清单的路径前缀
+            workers: 并行进程数，None表示CPU核数
+        """
+        self.source_dir = os.path.abspath(source_dir or os.path.dirname(os.path.abspath(__file__)))
+        self.output_dir = os.path.abspath(output_dir or os.path.join(self.source_dir, "audio"))
+        self.formats = formats or ["opus", "mp3"]
+        self.base_url = base_url
+        self.workers = workers or os.cpu_count() or 1
+        self.manifest_path = os.path.join(self.output_dir, MANIFEST_NAME)
+
+    def settings_key(self, profile_name):
+        """配置变化时缓存失效"""
+        profile = PROFILES[profile_name]
+        outputs = {name: profile["outputs"][name] for name in self.formats}
+        return json.dumps({"profile": profile_name, "channels": profile["channels"],
+                           "loudnorm": profile["loudnorm"], "outputs": outputs}, sort_keys=True)
+
+    @staticmethod
+    def output_files(entry):
+        return [o["file"] for o in entry.get("outputs", {}).values()]
+
+    def build(self, patterns=None, force=False):
+        """转码并更新清单，返回 (转码数, 跳过数, 失败数)"""
+        if not shutil.which("ffmpeg") or not shutil.which("ffprobe"):
+            raise RuntimeError("未找到 ffmpeg/ffprobe，请先安装并加入 PATH")
+
+        start = datetime.now()
+        os.makedirs(self.output_dir, exist_ok=True)
+        manifest = asset_cache.load_manifest(self.manifest_path, "audio")
+        entries = manifest.setdefault("audio", {})
+
+        sources = asset_cache.find_sources(self.source_dir, patterns or DEFAULT_SOURCES)
+        if not sources:
+            print("📝 没有找到需要处理的音频")
+            return 0, 0, 0
+
+        pending = {}
+        skipped = 0
+        for relative in sources:
+            profile_name = profile_for(relative)
+            digest, _ = asset_cache.hash_file(os.path.join(self.source_dir, relative))
+            settings = self.settings_key(profile_name)
+            if not force and asset_cache.is_cached(entries.get(relative), digest, settings,
+                                                   self.output_dir, self.output_files):
+                skipped += 1
+                continue
+            pending[relative] = (profile_name, digest, settings)
+
+        print(f"共 {len(sources)} 个音频，{skipped} 个未变化，{len(pending)} 个需要转码 "
+              f"({self.workers} 个进程)")
+
+        transcoded = failed = 0
+        if pending:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                futures = {
+                    executor.submit(transcode, self.source_dir, self.output_dir,
+                                    relative, profile_name, self.formats): relative
+                    for relative, (profile_name, _, _) in pending.items()
+                }
+                for future in as_completed(futures):
+                    relative = futures[future]
+                    try:
+                        entry = future.result()
+                    except Exception as e:
+                        failed += 1
+                        print(f"  ✗ {relative}: {e}")
+                        continue
+                    _, entry["hash"], entry["settings"] = pending[relative]
+                    entries[relative] = entry
+                    transcoded += 1
+                    smallest = min(o["bytes"] for o in entry["outputs"].values())
+                    ratio = entry["bytes"] / smallest if smallest else 0
+                    print(f"  ✓ {relative} [{entry['profile']}]: {entry['bytes'] // 1024} KB -> "
+                          f"{smallest // 1024} KB ({ratio:.1f}x), {entry['duration']}秒")
+
+        # 地址只取决于路径前缀，缓存命中的条目也按本次的 base_url 重新生成
+        for entry in entries.values():
+            for output in entry["outputs"].values():
+                output["url"] = self.base_url + output["file"]
+        manifest["base_url"] = self.base_url
+        manifest["updated_at"] = datetime.now().isoformat(timespec="seconds")
+        manifest["total_duration"] = round(sum(e.get("duration") or 0 for e in entries.values()), 3)
+        asset_cache.save_manifest(self.manifest_path, manifest)
+
+        elapsed = (datetime.now() - start).total_seconds()
+        print(f"✅ 完成: 转码 {transcoded}, 跳过 {skipped}, 失败 {failed} ({elapsed:.1f}秒)")
+        print(f"清单: {self.manifest_path}")
+        return transcoded, skipped, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量转码音频（响度归一化 + 低码率语音编码 + 时长清单）')
+    parser.add_argument('patterns', nargs='*', help='音频通配符（相对站点根目录），默认处理课程录音和音效')
+    parser.add_argument('-s', '--source', help='站点源码目录（默认脚本所在目录）', default=None)
+    parser.add_argument('-o', '--output', help='输出目录（默认 <源码目录>/audio）', default=None)
+    parser.add_argument('-f', '--formats', help='输出格式，逗号分隔 (opus,mp3)', default=None)
+    parser.add_argument('-b', '--base-url', help='清单中的路径前缀，例如 audio/', default="audio/")
+    parser.add_argument('-j', '--jobs', type=int, help='并行进程数（默认CPU核数）', default=None)
+    parser.add_argument('--force', action='store_true', help='忽略缓存，全部重新转码')
+
+    args = parser.parse_args()
+
+    formats = args.formats.split(',') if args.formats else None
+    for name in formats or []:
+        if name not in PROFILES["speech"]["outputs"]:
+            print(f"❌ 不支持的格式: {name}（可选: opus, mp3）")
+            sys.exit(1)
+
+    transcoder = AudioTranscoder(
+        source_dir=args.source,
+        output_dir=args.output,
+        formats=formats,
+        base_url=args.base_url,
+        workers=args.jobs
+    )
+
+    try:
+        _, _, failed = transcoder.build(patterns=args.patterns or None, force=args.force)
+        sys.exit(1 if failed else 0)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("\n\n👋 用户中断操作")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
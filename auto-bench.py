@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import io
+import sys
+import json
+import time
+import random
+import shutil
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+import importlib.util
+from contextlib import redirect_stdout
+from datetime import datetime
+
+import auto_log
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# 历史记录放在 auto-push 的状态目录，不放进站点仓库（auto-push 会 git add 整个仓库）
+DEFAULT_HISTORY = os.path.join(os.path.expanduser("~"), ".auto-push", "bench_history.json")
+
+STAGES = ["status", "add", "commit", "push", "pull"]
+
+# 模拟网络故障的 receive-pack / upload-pack 包装脚本
+FLAKY_WRAPPER = '''import os, sys, random
+if random.random() < float(os.environ.get("AUTO_BENCH_FAIL_RATE", "0")):
+    sys.stderr.write("fatal: unable to access origin: Connection refused\\n")
+    sys.exit(128)
+os.execvp("git", ["git"] + sys.argv[1:])
+'''
+
+
+def load_script(name):
+    """按文件路径加载带连字符的脚本模块（auto-push.py / auto-pull.py）"""
+    path = os.path.join(SCRIPT_DIR, name)
+    spec = importlib.util.spec_from_file_location(name.replace('-', '_')[:-3], path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def git(args, cwd):
+    """执行辅助 git 命令（不计时）"""
+    subprocess.run(["git"] + args, cwd=cwd, check=True, capture_output=True)
+
+
+class SyntheticRepo:
+    def __init__(self, root, small_files=200, small_size=4096, large_files=4,
+                 large_size=2 * 1024 * 1024, fail_rate=0.0, seed=0):
+        """
+        在临时目录中构建测试仓库：工作仓库 + 本地裸仓库 origin + 用于拉取的第二个克隆
+
+        Args:
+            small_files / small_size: 小文件（模拟 HTML）的数量和大小
+            large_files / large_size: 大文件（模拟 PNG/MP3）的数量和大小
+            fail_rate: 推送/拉取时模拟网络错误的概率
+        """
+        self.root = root
+        self.origin = os.path.join(root, "origin.git")
+        self.work = os.path.join(root, "work")
+        self.mirror = os.path.join(root, "pull")
+        self.small_files = small_files
+        self.small_size = small_size
+        self.large_files = large_files
+        self.large_size = large_size
+        self.fail_rate = fail_rate
+        self.random = random.Random(seed)
+
+    def write_small(self, index):
+        path = os.path.join(self.work, "pages", f"game{index}.html")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        words = ["<div>", "lotus", "amitofo", "</div>", "<p>", "snake", "tetris", "</p>"]
+        text = " ".join(self.random.choice(words) for _ in range(self.small_size // 6))
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"<!-- {time.time_ns()} -->\n{text[:self.small_size]}")
+
+    def write_large(self, index):
+        ext = ".png" if index % 2 == 0 else ".mp3"
+        path = os.path.join(self.work, "assets", f"asset{index}{ext}")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(os.urandom(self.large_size))
+
+    def configure_remote(self, repo):
+        """origin 通过包装脚本访问，用于注入网络错误"""
+        if not self.fail_rate:
+            return
+        wrapper = os.path.join(self.root, "flaky.py")
+        command = f'"{sys.executable}" "{wrapper}"'
+        git(["config", "remote.origin.receivepack", f"{command} receive-pack"], repo)
+        git(["config", "remote.origin.uploadpack", f"{command} upload-pack"], repo)
+
+    def create(self):
+        """创建仓库并推送初始提交"""
+        git(["init", "--bare", self.origin], self.root)
+        git(["symbolic-ref", "HEAD", "refs/heads/main"], self.origin)
+        os.makedirs(self.work)
+        git(["init"], self.work)
+        git(["symbolic-ref", "HEAD", "refs/heads/main"], self.work)
+        git(["config", "user.name", "auto-bench"], self.work)
+        git(["config", "user.email", "auto-bench@localhost"], self.work)
+        git(["remote", "add", "origin", self.origin], self.work)
+        for i in range(self.small_files):
+            self.write_small(i)
+        for i in range(self.large_files):
+            self.write_large(i)
+        git(["add", "."], self.work)
+        git(["commit", "-q", "-m", "initial"], self.work)
+        git(["push", "-q", "origin", "main"], self.work)
+        git(["clone", "-q", "-b", "main", self.origin, self.mirror], self.root)
+
+        with open(os.path.join(self.root, "flaky.py"), 'w', encoding='utf-8') as f:
+            f.write(FLAKY_WRAPPER)
+        self.configure_remote(self.work)
+        self.configure_remote(self.mirror)
+
+    def modify(self, small_count, large_count):
+        """修改一部分文件，模拟一次日常提交"""
+        for i in self.random.sample(range(self.small_files), min(small_count, self.small_files)):
+            self.write_small(i)
+        for i in self.random.sample(range(self.large_files), min(large_count, self.large_files)):
+            self.write_large(i)
+
+
+class Benchmark:
+    def __init__(self, rounds=5, touch_small=20, touch_large=1, fail_rate=0.0,
+                 max_retries=10, verbose=False, backend="subprocess", **repo_options):
+        self.rounds = rounds
+        self.touch_small = touch_small
+        self.touch_large = touch_large
+        self.fail_rate = fail_rate
+        self.max_retries = max_retries
+        self.verbose = verbose
+        self.backend = backend
+        self.repo_options = repo_options
+        # 被测脚本导入时不配置日志，这里自行配置：不写用户的 ~/.auto-logs，
+        # 非 verbose 时也不让后台日志线程在报告中间输出
+        for name in ("auto-push", "auto-pull"):
+            auto_log.setup(name, console=verbose, file=False)
+        self.auto_push = load_script("auto-push.py")
+        self.auto_pull = load_script("auto-pull.py")
+
+    def timed(self, func):
+        """计时执行，非 verbose 时屏蔽工具自身的输出"""
+        output = None if self.verbose else io.StringIO()
+        start = time.perf_counter()
+        if output is None:
+            result = func()
+        else:
+            with redirect_stdout(output):
+                result = func()
+        return time.perf_counter() - start, result
+
+    def pull_until_success(self, repo):
+        """run_git_pull 只在当前目录工作，也不自带重试"""
+        previous = os.getcwd()
+        os.chdir(repo)
+        try:
+            for _ in range(self.max_retries):
+                if self.auto_pull.run_git_pull():
+                    return True
+            return False
+        finally:
+            os.chdir(previous)
+
+    def run_round(self, repo):
+        repo.modify(self.touch_small, self.touch_large)
+        tool = self.auto_push.GitAutoPush(repo_path=repo.work, max_retries=self.max_retries,
+                                          wait_time=0, backend=self.backend)
+        timings = {}
+        timings["status"], changed = self.timed(tool.has_changes)
+        if not changed:
+            raise RuntimeError("修改文件后 git status 没有检测到变更")
+        timings["add"], (ok, _) = self.timed(tool.git_add)
+        if not ok:
+            raise RuntimeError("git add 失败")
+        timings["commit"], (ok, _) = self.timed(
+            lambda: tool.git_commit(f"bench {datetime.now().isoformat()}"))
+        if not ok:
+            raise RuntimeError("git commit 失败")
+        timings["push"], ok = self.timed(tool.push_with_retry)
+        if not ok:
+            raise RuntimeError("git push 失败（超过最大重试次数）")
+        timings["pull"], ok = self.timed(lambda: self.pull_until_success(repo.mirror))
+        if not ok:
+            raise RuntimeError("git pull 失败（超过最大重试次数）")
+        return timings
+
+    def run(self):
+        root = tempfile.mkdtemp(prefix="auto-bench-")
+        try:
+            repo = SyntheticRepo(root, fail_rate=self.fail_rate, **self.repo_options)
+            start = time.perf_counter()
+            repo.create()
+            # 包装脚本从环境变量读取故障概率，构建仓库完成后才开始注入
+            os.environ["AUTO_BENCH_FAIL_RATE"] = str(self.fail_rate)
+            setup_time = time.perf_counter() - start
+            print(f"测试仓库已创建: {root} ({setup_time:.1f}秒)")
+
+            samples = {stage: [] for stage in STAGES}
+            for i in range(self.rounds):
+                timings = self.run_round(repo)
+                for stage in STAGES:
+                    samples[stage].append(timings[stage])
+                print(f"  第 {i + 1}/{self.rounds} 轮: " +
+                      ", ".join(f"{stage} {timings[stage] * 1000:.0f}ms" for stage in STAGES))
+            return samples
+        finally:
+            os.environ.pop("AUTO_BENCH_FAIL_RATE", None)
+            shutil.rmtree(root, ignore_errors=True)
+
+
+def summarize(samples):
+    return {
+        stage: {
+            "median": statistics.median(values),
+            "mean": statistics.fmean(values),
+            "min": min(values),
+            "max": max(values),
+        }
+        for stage, values in samples.items()
+    }
+
+
+def tool_revision():
+    """工具代码的提交号，便于对比不同版本"""
+    result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPT_DIR,
+                            capture_output=True, text=True)
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def git_version():
+    result = subprocess.run(["git", "--version"], capture_output=True, text=True)
+    return result.stdout.strip()
+
+
+def append_history(path, record):
+    """追加到 JSON 历史记录，返回参数相同的上一条记录"""
+    history = []
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                history = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠ 读取历史记录失败，将新建: {e}")
+    previous = next((r for r in reversed(history) if r.get("params") == record["params"]), None)
+    history.append(record)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(history, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    return previous
+
+
+def print_report(summary, previous):
+    print("\n" + "=" * 50)
+    print(f"{'阶段':<8}{'中位数':>10}{'平均':>10}{'最小':>10}{'最大':>10}{'对比上次':>12}")
+    print("=" * 50)
+    for stage in STAGES:
+        stats = summary[stage]
+        delta = ""
+        if previous:
+            old = previous["summary"][stage]["median"]
+            if old:
+                delta = f"{(stats['median'] - old) / old * 100:+.1f}%"
+        print(f"{stage:<8}" + "".join(f"{stats[k] * 1000:>9.0f}ms" for k in ("median", "mean", "min", "max"))
+              + f"{delta:>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='auto-push / auto-pull 分阶段性能测试（本地裸仓库作为 origin）')
+    parser.add_argument('-n', '--rounds', type=int, help='测试轮数', default=5)
+    parser.add_argument('--small-files', type=int, help='小文件数量（模拟 HTML）', default=200)
+    parser.add_argument('--small-size', type=int, help='小文件大小（字节）', default=4096)
+    parser.add_argument('--large-files', type=int, help='大文件数量（模拟 PNG/MP3）', default=4)
+    parser.add_argument('--large-size', type=float, help='大文件大小（MB）', default=2)
+    parser.add_argument('--touch-small', type=int, help='每轮修改的小文件数', default=20)
+    parser.add_argument('--touch-large', type=int, help='每轮修改的大文件数', default=1)
+    parser.add_argument('--fail-rate', type=float, help='推送/拉取模拟网络错误的概率 (0-1)', default=0.0)
+    parser.add_argument('--backend', choices=['subprocess', 'dulwich', 'auto'], default='subprocess',
+                        help='GitAutoPush 的 status/add/commit 后端')
+    parser.add_argument('--seed', type=int, help='随机种子', default=0)
+    parser.add_argument('--history', help='历史记录文件', default=DEFAULT_HISTORY)
+    parser.add_argument('--no-save', action='store_true', help='不写入历史记录')
+    parser.add_argument('-v', '--verbose', action='store_true', help='显示工具自身的输出')
+
+    args = parser.parse_args()
+
+    params = {
+        "rounds": args.rounds,
+        "small_files": args.small_files,
+        "small_size": args.small_size,
+        "large_files": args.large_files,
+        "large_size": int(args.large_size * 1024 * 1024),
+        "touch_small": args.touch_small,
+        "touch_large": args.touch_large,
+        "fail_rate": args.fail_rate,
+        "seed": args.seed,
+        "backend": args.backend,
+    }
+
+    print("=" * 50)
+    print("⏱ Git 自动同步工具性能测试")
+    print("=" * 50)
+    print(", ".join(f"{k}={v}" for k, v in params.items()))
+
+    benchmark = Benchmark(
+        rounds=args.rounds,
+        touch_small=args.touch_small,
+        touch_large=args.touch_large,
+        fail_rate=args.fail_rate,
+        verbose=args.verbose,
+        backend=args.backend,
+        small_files=args.small_files,
+        small_size=args.small_size,
+        large_files=args.large_files,
+        large_size=params["large_size"],
+        seed=args.seed,
+    )
+
+    try:
+        samples = benchmark.run()
+    except (RuntimeError, subprocess.CalledProcessError) as e:
+        print(f"❌ 测试失败: {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("\n\n👋 用户中断操作")
+        sys.exit(1)
+
+    summary = summarize(samples)
+    record = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "revision": tool_revision(),
+        "git": git_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": params,
+        "summary": summary,
+        "samples": samples,
+    }
+    previous = None
+    if not args.no_save:
+        previous = append_history(args.history, record)
+    print_report(summary, previous)
+    if not args.no_save:
+        print(f"\n结果已写入: {args.history}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import sys
+import json
+import gzip
+import shutil
+import fnmatch
+import argparse
+from datetime import datetime
+
+import asset_cache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 站点线上地址：页面里大量使用绝对地址引用根目录的资源
+SITE_URL = "https://amitofoicu.github.io/home/"
+
+# 根目录页面：全部发布，没有被链接的页面（例如 privacy.html）可能在站外登记过地址
+# （游戏目录以 <目录>/index.html 的形式单独识别）
+ROOT_PAGES = ["*.html", "*.htm"]
+
+# 值得预压缩的文本类型；图片和音频本身已压缩，不再处理
+COMPRESSIBLE_EXTENSIONS = {".html", ".htm", ".css", ".js", ".json", ".txt", ".svg", ".xml"}
+
+# 不会作为网页资源发布的文件
+EXCLUDED_EXTENSIONS = {".py", ".bat", ".exe", ".chm", ".md"}
+
+# 脚本运行时拼出地址的资源（game5.html 的 `${type}.mp3`），保留原文件名、不加哈希
+UNHASHED_ASSETS = {"win.mp3", "xiaochu.mp3"}
+
+# 引号或 url( 包围的候选引用
+REFERENCE_PATTERN = re.compile(r"""(["'(])([^"'()<>\s`]+)(?=["')])""")
+
+MANIFEST_NAME = "build-manifest.json"
+
+
+class SiteBuilder:
+    def __init__(self, source_dir=None, output_dir=None, hash_length=10, compress=True):
+        """
+        初始化部署产物构建工具
+
+        Args:
+            source_dir: 站点源码目录，None表示脚本所在目录
+            output_dir: 输出目录，None表示 <源码目录>/dist
+            hash_length: 文件名中内容哈希的长度
+            compress: 是否生成 .gz / .br 预压缩副本
+        """
+        self.source_dir = os.path.abspath(source_dir or os.path.dirname(os.path.abspath(__file__)))
+        self.output_dir = os.path.abspath(output_dir or os.path.join(self.source_dir, "dist"))
+        self.hash_length = hash_length
+        self.compress = compress
+        self.assets = {}      # 源相对路径 -> 带哈希的相对路径
+        self.pages = {}       # 页面相对路径 -> 引用的资源列表
+        self.missing = set()
+        self.stats = {"files": 0, "bytes": 0, "gz_bytes": 0, "br_bytes": 0}
+
+    def find_games(self):
+        """游戏目录：根目录下包含 index.html 的子目录"""
+        games = []
+        for name in sorted(os.listdir(self.source_dir)):
+            path = os.path.join(self.source_dir, name)
+            if (os.path.isdir(path) and not name.startswith('.')
+                    and os.path.abspath(path) != self.output_dir
+                    and os.path.isfile(os.path.join(path, "index.html"))):
+                games.append(name)
+        return games
+
+    def find_root_pages(self):
+        """按 ROOT_PAGES 匹配根目录页面"""
+        names = sorted(os.listdir(self.source_dir))
+        return [n for n in names
+                if os.path.isfile(os.path.join(self.source_dir, n))
+                and any(fnmatch.fnmatch(n, pattern) for pattern in ROOT_PAGES)]
+
+    def resolve_reference(self, page, url):
+        """
+        把页面中的引用解析为源码目录内的相对路径
+        返回 (相对路径, 后缀)，无法解析为本地文件时返回 (None, None)
+        """
+        if url.startswith(SITE_URL):
+            relative = url[len(SITE_URL):]
+            base = ""
+        elif url.startswith(('#', 'data:', '//', 'mailto:', 'javascript:', '$', '{')) or '://' in url:
+            return None, None
+        else:
+            relative = url
+            base = os.path.dirname(page)
+
+        suffix = ""
+        match = re.search(r"[?#]", relative)
+        if match:
+            relative, suffix = relative[:match.start()], relative[match.start():]
+        if not relative or relative.startswith('/'):
+            return None, None
+
+        path = os.path.normpath(os.path.join(base, relative)).replace(os.sep, '/')
+        if path.startswith('..'):
+            return None, None
+        full_path = os.path.join(self.source_dir, path)
+        if os.path.isdir(full_path):
+            index = os.path.join(full_path, "index.html")
+            return (path.rstrip('/') + "/index.html", None) if os.path.isfile(index) else (None, None)
+        if not os.path.isfile(full_path):
+            if url.startswith(SITE_URL) and os.path.splitext(path)[1]:
+                self.missing.add(path)
+            return None, None
+        if os.path.splitext(path)[1].lower() in EXCLUDED_EXTENSIONS:
+            return None, None
+        return path, suffix
+
+    def hashed_name(self, path):
+        """根据文件内容生成带哈希的文件名，例如 logo.3fa2b1c9d0.jpg"""
+        if path in self.assets:
+            return self.assets[path]
+        if path in UNHASHED_ASSETS:
+            self.assets[path] = path
+            self.emit(path, path)
+            return path
+        digest, _ = asset_cache.hash_file(os.path.join(self.source_dir, path))
+        stem, ext = os.path.splitext(path)
+        hashed = f"{stem}.{digest[:self.hash_length]}{ext}"
+        self.assets[path] = hashed
+        self.emit(path, hashed)
+        return hashed
+
+    def emit(self, source_path, target_path, data=None):
+        """写出一个文件及其预压缩副本"""
+        target = os.path.join(self.output_dir, target_path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if data is None:
+            shutil.copyfile(os.path.join(self.source_dir, source_path), target)
+            size = os.path.getsize(target)
+        else:
+            with open(target, 'wb') as f:
+                f.write(data)
+            size = len(data)
+        self.stats["files"] += 1
+        self.stats["bytes"] += size
+
+        if not self.compress or os.path.splitext(target)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+            return
+        if data is None:
+            with open(target, 'rb') as f:
+                data = f.read()
+        # 压缩后没有明显变小就不写，避免服务器选择更大的副本
+        gz_data = gzip.compress(data, compresslevel=9, mtime=0)
+        if len(gz_data) < size * 0.9:
+            with open(target + ".gz", 'wb') as f:
+                f.write(gz_data)
+            self.stats["gz_bytes"] += len(gz_data)
+        if brotli is not None:
+            br_data = brotli.compress(data, quality=11)
+            if len(br_data) < size * 0.9:
+                with open(target + ".br", 'wb') as f:
+                    f.write(br_data)
+                self.stats["br_bytes"] += len(br_data)
+
+    def build_page(self, page, scope=None):
+        """
+        处理一个页面：复制引用的资源（带哈希），重写页面中的引用
+        返回页面中链接到的其他页面
+        scope: 只跟随该目录内的页面链接，None表示不限
+        """
+        with open(os.path.join(self.source_dir, page), 'r', encoding='utf-8') as f:
+            html = f.read()
+
+        linked_pages = []
+        used_assets = []
+
+        def rewrite(match):
+            quote, url = match.group(1), match.group(2)
+            path, suffix = self.resolve_reference(page, url)
+            if path is None:
+                return match.group(0)
+            if path.endswith(('.html', '.htm')):
+                if scope is None or path.startswith(scope + '/'):
+                    linked_pages.append(path)
+                return match.group(0)
+            hashed = self.hashed_name(path)
+            used_assets.append(path)
+            if url.startswith(SITE_URL):
+                new_url = SITE_URL + hashed
+            else:
+                new_url = os.path.relpath(hashed, os.path.dirname(page) or '.').replace(os.sep, '/')
+            return quote + new_url + suffix
+
+        html = REFERENCE_PATTERN.sub(rewrite, html)
+        self.pages[page] = sorted(set(used_assets))
+        self.emit(page, page, html.encode('utf-8'))
+        return linked_pages
+
+    def prepare_output(self):
+        """清空上一次的构建结果；拒绝删除不是由本工具生成的目录"""
+        if os.path.exists(self.output_dir):
+            entries = os.listdir(self.output_dir)
+            if entries and MANIFEST_NAME not in entries:
+                raise RuntimeError(f"输出目录不是空目录，也不是之前的构建结果: {self.output_dir}")
+            shutil.rmtree(self.output_dir)
+        os.makedirs(self.output_dir)
+
+    def build(self, games=None, include_root=True):
+        """
+        构建部署产物
+
+        Args:
+            games: 要构建的游戏目录列表，None表示全部
+            include_root: 是否包含根目录页面
+        """
+        start = datetime.now()
+        self.prepare_output()
+
+        all_games = self.find_games()
+        selected = all_games if games is None else games
+        for game in selected:
+            if game not in all_games:
+                raise ValueError(f"未找到游戏目录: {game}")
+
+        # 根页面可以跟随链接到任意页面；只构建游戏时不离开游戏目录
+        queue = [(p, None) for p in self.find_root_pages()] if include_root else []
+        queue += [(f"{game}/index.html", None if include_root else game) for game in selected]
+        while queue:
+            page, scope = queue.pop(0)
+            if page in self.pages:
+                continue
+            for linked in self.build_page(page, scope):
+                if linked not in self.pages:
+                    queue.append((linked, scope))
+
+        manifest = {
+            "built_at": datetime.now().isoformat(timespec="seconds"),
+            "site_url": SITE_URL,
+            "brotli": brotli is not None and self.compress,
+            "assets": dict(sorted(self.assets.items())),
+            "pages": dict(sorted(self.pages.items())),
+            "missing": sorted(self.missing),
+            "stats": self.stats,
+        }
+        with open(os.path.join(self.output_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        elapsed = (datetime.now() - start).total_seconds()
+        print(f"✅ 构建完成: {len(self.pages)} 个页面, {len(self.assets)} 个资源, "
+              f"{self.stats['bytes'] / 1024 / 1024:.1f} MB ({elapsed:.1f}秒)")
+        print(f"输出目录: {self.output_dir}")
+        if self.compress and brotli is None:
+            print("⚠ 未安装 brotli 模块，只生成 .gz 副本 (pip install brotli)")
+        for path in sorted(self.missing):
+            print(f"  ⚠ 页面引用的文件不存在: {path}")
+        return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成精简的部署产物（内容哈希文件名 + 预压缩）')
+    parser.add_argument('-s', '--source', help='站点源码目录（默认脚本所在目录）', default=None)
+    parser.add_argument('-o', '--output', help='输出目录（默认 <源码目录>/dist）', default=None)
+    parser.add_argument('-g', '--game', action='append', help='只构建指定游戏目录（可重复）', default=None)
+    parser.add_argument('--no-root', action='store_true', help='不包含根目录页面')
+    parser.add_argument('--no-compress', action='store_true', help='不生成 .gz/.br 预压缩副本')
+    parser.add_argument('--list', action='store_true', help='列出识别到的游戏和根页面')
+
+    args = parser.parse_args()
+
+    builder = SiteBuilder(
+        source_dir=args.source,
+        output_dir=args.output,
+        compress=not args.no_compress
+    )
+
+    if args.list:
+        print("游戏目录:", ", ".join(builder.find_games()))
+        print("根页面:", ", ".join(builder.find_root_pages()))
+        sys.exit(0)
+
+    try:
+        builder.build(games=args.game, include_root=not args.no_root)
+        sys.exit(0)
+    except (RuntimeError, ValueError, OSError) as e:
+        print(f"❌ 构建失败: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
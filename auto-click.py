@@ -5,11 +5,25 @@ import random
 import json
 import os
 import select
+import logging
 from PIL import Image
 
+import auto_log
+
+try:
+    from Xlib import display as xdisplay
+    from Xlib.ext import damage as xdamage
+except ImportError:
+    xdisplay = None
+    xdamage = None
+
 # 配置文件路径
 CONFIG_FILE = "scroll_config.json"
 
+# 每次检测的状态只刷新终端状态行，完整记录写入 ~/.auto-logs/auto-click.jsonl
+# （启动时调用 auto_log.setup）
+log = logging.getLogger("auto-click")
+
 def load_last_coordinates():
     """加载上一次保存的坐标"""
     try:
@@ -66,7 +80,8 @@ def scroll_at_coordinate(x, y, scroll_amount, scroll_name="scroll"):
     pyautogui.moveTo(original_pos.x, original_pos.y, duration=0.2)
     
     direction = "向下" if scroll_amount < 0 else "向上"
-    print(f"在坐标 ({x}, {y}) 附近执行{scroll_name}: {direction} {abs(scroll_amount)} 单位")
+    log.info("在坐标 (%d, %d) 附近执行%s: %s %d 单位", x, y, scroll_name, direction, abs(scroll_amount),
+             extra=auto_log.fields(event="scroll", x=x, y=y, amount=scroll_amount))
     time.sleep(0.2)
     
     return True
@@ -106,7 +121,7 @@ def simulate_coordinate_scroll(x, y, scroll_attempt=1):
             time.sleep(0.4)
             scroll_at_coordinate(x, y, random.randint(-280, -220), "强力向下")
     
-    print(f"第{scroll_attempt}次坐标滚动尝试完成")
+    log.info("第%d次坐标滚动尝试完成", scroll_attempt)
     return True
 
 def check_pixel_changes(screenshot, previous_pixels=None, threshold=15):
@@ -143,7 +158,7 @@ def check_pixel_changes(screenshot, previous_pixels=None, threshold=15):
         
         # 如果变化超过10%，认为有显著变化
         if change_percentage > 10:
-            print(f"像素变化率: {change_percentage:.2f}%")
+            log.info("像素变化率: %.2f%%", change_percentage)
             return True, current_pixels
     
     # 基础检查：颜色多样性
@@ -171,6 +186,97 @@ def get_pixel_data(screenshot):
                     pixels.append(pixel)
             return pixels
 
+class PollingChangeSource:
+    """
+    轮询变化源：每个检查间隔都截图比对
+    """
+    name = "轮询"
+
+    def wait(self, timeout):
+        """等待下一次检查，返回区域是否可能发生了变化"""
+        time.sleep(timeout)
+        return True
+
+    def close(self):
+        pass
+
+
+class XDamageChangeSource:
+    """
+    基于 X11 DAMAGE 扩展的变化源（Linux/X11，包括 Xvfb）
+    只有监控区域被重绘时才唤醒检测，空闲时不截图
+    """
+    name = "XDamage"
+
+    def __init__(self, region, debounce=0.1):
+        self.left, self.top, self.width, self.height = region
+        self.debounce = debounce
+        self.display = xdisplay.Display()
+        if not self.display.has_extension('DAMAGE'):
+            self.display.close()
+            raise RuntimeError("X 服务器不支持 DAMAGE 扩展")
+        self.display.damage_query_version()
+        self.event_type = self.display.query_extension('DAMAGE').first_event + xdamage.DamageNotifyCode
+        root = self.display.screen().root
+        # RawRectangles 级别会逐个报告重绘矩形，无需 DamageSubtract
+        self.damage = root.damage_create(xdamage.DamageReportRawRectangles)
+        self.display.flush()
+
+    def intersects(self, area):
+        return (area.x < self.left + self.width and area.x + area.width > self.left
+                and area.y < self.top + self.height and area.y + area.height > self.top)
+
+    def drain(self):
+        """处理已到达的事件，返回是否有落在监控区域内的重绘"""
+        damaged = False
+        while self.display.pending_events():
+            event = self.display.next_event()
+            if event.type == self.event_type and self.intersects(event.area):
+                damaged = True
+        return damaged
+
+    def wait(self, timeout):
+        """阻塞等待监控区域的重绘事件，最多等待 timeout 秒"""
+        deadline = time.time() + timeout
+        if self.drain():
+            return True
+        fd = self.display.fileno()
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return False
+            readable, _, _ = select.select([fd], [], [], remaining)
+            if readable and self.drain():
+                # 重绘通常成批到达，稍等片刻合并后再截图
+                time.sleep(min(self.debounce, max(0, deadline - time.time())))
+                self.drain()
+                return True
+
+    def close(self):
+        try:
+            self.display.damage_destroy(self.damage)
+            self.display.close()
+        except Exception:
+            pass
+
+
+def create_change_source(region, mode=None):
+    """
+    选择变化源：auto（默认，X11 可用时使用 XDamage）、xdamage 或 poll
+    可通过环境变量 AUTO_CLICK_CHANGE_SOURCE 指定
+    """
+    mode = (mode or os.environ.get("AUTO_CLICK_CHANGE_SOURCE", "auto")).lower()
+    if mode == "poll":
+        return PollingChangeSource()
+    if sys.platform.startswith('linux') and os.environ.get("DISPLAY") and xdisplay is not None:
+        try:
+            return XDamageChangeSource(region)
+        except Exception as e:
+            print(f"XDamage 不可用，改用轮询: {e}")
+    elif mode == "xdamage":
+        print("XDamage 需要 Linux/X11 和 python-xlib，改用轮询")
+    return PollingChangeSource()
+
 def check_keyboard_input(timeout=0.1):
     """
     检查是否有键盘输入（非阻塞）
@@ -235,12 +341,22 @@ def monitor_and_click_optimized(target_x, target_y, check_interval=2, max_scroll
     
     last_key_check = time.time()
     
+    # 变化源：XDamage 可用时只在区域重绘后才截图
+    change_source = create_change_source(region)
+    region_dirty = True
+    unique_colors = 0
+    tick_start = time.time()
+    log.info("变化检测方式: %s", change_source.name, extra=auto_log.KEEP)
+    
     try:
         while not force_exit:
             # 定期检查键盘输入（每0.1秒检查一次）
             current_time = time.time()
             if current_time - last_key_check >= 0.1:
                 key_input = check_keyboard_input(0.01)
+                if key_input in ('ctrl_c', 'enter'):
+                    # 交互提示之前先写出队列里的日志，保证顺序
+                    auto_log.flush()
                 if key_input == 'ctrl_c':
                     if paused:
                         print("\n⚠️ 在暂停状态下检测到Ctrl+C，完全退出程序")
@@ -269,48 +385,53 @@ def monitor_and_click_optimized(target_x, target_y, check_interval=2, max_scroll
                 time.sleep(0.1)
                 continue
             
-            try:
-                screenshot = pyautogui.screenshot(region=region)
-            except Exception as e:
-                print(f"区域截图失败: {e}")
-                # 如果区域截图失败，尝试全屏截图
+            if not region_dirty and previous_pixels is not None:
+                # 区域没有重绘，跳过截图，按无变化处理
+                has_changed = False
+            else:
                 try:
-                    screenshot = pyautogui.screenshot()
-                    # 从全屏截图中裁剪目标区域
-                    screen_width, screen_height = pyautogui.size()
-                    crop_x1 = max(0, target_x - region_width//2)
-                    crop_y1 = max(0, target_y - region_height//2)
-                    crop_x2 = min(screen_width, crop_x1 + region_width)
-                    crop_y2 = min(screen_height, crop_y1 + region_height)
-                    screenshot = screenshot.crop((crop_x1, crop_y1, crop_x2, crop_y2))
-                except Exception as e2:
-                    print(f"截图失败: {e2}")
-                    time.sleep(check_interval)
-                    continue
+                    screenshot = pyautogui.screenshot(region=region)
+                except Exception as e:
+                    log.warning("区域截图失败: %s", e)
+                    # 如果区域截图失败，尝试全屏截图
+                    try:
+                        screenshot = pyautogui.screenshot()
+                        # 从全屏截图中裁剪目标区域
+                        screen_width, screen_height = pyautogui.size()
+                        crop_x1 = max(0, target_x - region_width//2)
+                        crop_y1 = max(0, target_y - region_height//2)
+                        crop_x2 = min(screen_width, crop_x1 + region_width)
+                        crop_y2 = min(screen_height, crop_y1 + region_height)
+                        screenshot = screenshot.crop((crop_x1, crop_y1, crop_x2, crop_y2))
+                    except Exception as e2:
+                        log.error("截图失败: %s", e2)
+                        time.sleep(check_interval)
+                        continue
             
-            # 使用统一的像素数据获取方法
-            current_pixels = get_pixel_data(screenshot)
+                # 使用统一的像素数据获取方法
+                current_pixels = get_pixel_data(screenshot)
             
-            # 检测像素变化
-            has_changed = False
-            unique_colors = len(set(current_pixels))
+                # 检测像素变化
+                has_changed = False
+                unique_colors = len(set(current_pixels))
             
-            if previous_pixels:
-                if len(current_pixels) == len(previous_pixels):
-                    # 计算像素差异百分比
-                    changed_pixels = sum(1 for i in range(len(current_pixels)) 
-                                       if current_pixels[i] != previous_pixels[i])
-                    change_percentage = changed_pixels / len(current_pixels) * 100
+                if previous_pixels:
+                    if len(current_pixels) == len(previous_pixels):
+                        # 计算像素差异百分比
+                        changed_pixels = sum(1 for i in range(len(current_pixels)) 
+                                           if current_pixels[i] != previous_pixels[i])
+                        change_percentage = changed_pixels / len(current_pixels) * 100
                     
-                    # 如果变化超过10%，认为有显著变化
-                    if change_percentage > 10:
-                        print(f"像素变化率: {change_percentage:.2f}%")
-                        has_changed = True
-            else:
-                # 第一次检测，如果有足够颜色就认为可能有内容
-                has_changed = unique_colors > 20
+                        # 如果变化超过10%，认为有显著变化
+                        if change_percentage > 10:
+                            log.info("像素变化率: %.2f%%", change_percentage,
+                                     extra=auto_log.fields(change=round(change_percentage, 2)))
+                            has_changed = True
+                else:
+                    # 第一次检测，如果有足够颜色就认为可能有内容
+                    has_changed = unique_colors > 20
             
-            previous_pixels = current_pixels
+                previous_pixels = current_pixels
             
             if has_changed:
                 no_change_count = 0
@@ -319,7 +440,10 @@ def monitor_and_click_optimized(target_x, target_y, check_interval=2, max_scroll
                 # 检查是否是有效点击区域（非纯色背景）
                 if unique_colors > 30:  # 按钮通常有更多颜色
                     click_count += 1
-                    print(f"[{click_count}] 检测到有效变化，点击坐标 ({target_x}, {target_y}) - {time.strftime('%H:%M:%S')}")
+                    log.info("[%d] 检测到有效变化，点击坐标 (%d, %d) - %s", click_count, target_x, target_y,
+                             time.strftime('%H:%M:%S'),
+                             extra=auto_log.keep_fields(event="click", count=click_count,
+                                                        x=target_x, y=target_y))
                     
                     # 点击前确保鼠标在正确位置
                     pyautogui.moveTo(target_x, target_y, duration=0.1)
@@ -328,7 +452,7 @@ def monitor_and_click_optimized(target_x, target_y, check_interval=2, max_scroll
                     
                     # 点击后等待更长时间，避免快速重复点击
                     wait_time = random.uniform(2.5, 4.0)
-                    print(f"点击后等待 {wait_time:.1f} 秒")
+                    log.info("点击后等待 %.1f 秒", wait_time)
                     time.sleep(wait_time)
                     
                     # 点击后重置监控
@@ -336,19 +460,25 @@ def monitor_and_click_optimized(target_x, target_y, check_interval=2, max_scroll
                     time.sleep(check_interval)
                     continue
             else:
+                # 重绘唤醒可能远早于检查间隔（动画、光标闪烁），补足剩余时间，
+                # 无变化计数（自动滚动、自动暂停）仍按 check_interval 计时
+                remaining = check_interval - (time.time() - tick_start)
+                if remaining > 0:
+                    time.sleep(remaining)
                 no_change_count += 1
-                print(f"无变化检测次数: {no_change_count} (颜色数: {unique_colors})")
+                log.info("无变化检测次数: %d (颜色数: %d)", no_change_count, unique_colors,
+                         extra=auto_log.fields(no_change=no_change_count, colors=unique_colors))
                 
                 # 如果连续多次无变化，尝试基于坐标滚动
                 if no_change_count >= 5 and scroll_attempts < max_scroll_attempts:
-                    print(f"尝试第{scroll_attempts + 1}次坐标滚动...")
+                    log.info("尝试第%d次坐标滚动...", scroll_attempts + 1, extra=auto_log.KEEP)
                     simulate_coordinate_scroll(target_x, target_y, scroll_attempts + 1)
                     scroll_attempts += 1
                     no_change_count = 0  # 重置计数
                     
                     # 滚动后等待页面稳定
                     wait_time = 1.0 + scroll_attempts * 0.3
-                    print(f"滚动后等待 {wait_time:.1f} 秒让页面稳定")
+                    log.info("滚动后等待 %.1f 秒让页面稳定", wait_time)
                     time.sleep(wait_time)
                     
                     # 滚动后重置像素状态
@@ -356,6 +486,7 @@ def monitor_and_click_optimized(target_x, target_y, check_interval=2, max_scroll
                 
                 # 如果已经达到最大滚动次数，仍然没有变化，则暂停检测
                 elif no_change_count >= 10 and scroll_attempts >= max_scroll_attempts:
+                    auto_log.flush()
                     print(f"\n=== 已达到最大滚动次数 ({max_scroll_attempts})，连续 {no_change_count} 次无变化 ===")
                     print("自动暂停检测，等待用户干预...")
                     print("按Enter键恢复检测，或按Ctrl+C完全退出")
@@ -363,10 +494,12 @@ def monitor_and_click_optimized(target_x, target_y, check_interval=2, max_scroll
                     no_change_count = 0
                     continue
             
-            time.sleep(check_interval)
+            tick_start = time.time()
+            region_dirty = change_source.wait(check_interval)
             
     except KeyboardInterrupt:
         # 处理主循环外的Ctrl+C
+        auto_log.flush()
         print("\n⚠️ 检测到Ctrl+C")
         print("按Enter键恢复检测，或再次按Ctrl+C完全退出")
         
@@ -396,11 +529,11 @@ def monitor_and_click_optimized(target_x, target_y, check_interval=2, max_scroll
                 break
     
     except Exception as e:
-        print(f"发生错误: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("发生错误: %s", e)
     
     finally:
+        change_source.close()
+        auto_log.flush()
         if force_exit:
             print(f"\n程序完全退出，总共点击 {click_count} 次")
         else:
@@ -444,10 +577,12 @@ def test_coordinate_scroll():
     ]
     
     for desc, attempt in test_scenarios:
+        auto_log.flush()
         input(f"\n按Enter进行{desc}...")
         simulate_coordinate_scroll(x, y, attempt)
         time.sleep(1)
     
+    auto_log.flush()
     print("\n坐标滚动测试完成！")
     return x, y
 
@@ -480,11 +615,13 @@ def coordinate_scroll_demo():
         simulate_coordinate_scroll(x, y, 1)
         time.sleep(0.5)
         simulate_coordinate_scroll(x, y, 2)
+        auto_log.flush()
         return x, y
     else:
         return None, None
 
 if __name__ == "__main__":
+    auto_log.setup("auto-click")
     print("=== 坐标感知版自动点击监控工具 ===")
     print("特点：基于捕获的坐标位置进行滚动操作")
     print("=" * 50)
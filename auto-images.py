@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from PIL import Image
+
+import asset_cache
+
+# 默认处理的封面图（相对站点根目录的通配符）
+DEFAULT_SOURCES = [
+    "lianchi*.jpg",
+    "lotus*.jpg",
+    "black-8-billard/taiqiu_*.png",
+    "match-2-puzzle/match2_2_3.png",
+]
+
+DEFAULT_WIDTHS = [320, 640, 960, 1280]
+
+# 各输出格式的编码参数
+FORMATS = {
+    "webp": {"ext": ".webp", "pil_format": "WEBP", "options": {"quality": 75, "method": 6}},
+    "jpeg": {"ext": ".jpg", "pil_format": "JPEG",
+             "options": {"quality": 80, "optimize": True, "progressive": True}},
+}
+
+MANIFEST_NAME = "manifest.json"
+
+
+def target_widths(original_width, widths):
+    """小于原图宽度的目标宽度；原图比所有目标都小时只输出原宽度"""
+    selected = [w for w in sorted(set(widths)) if w < original_width]
+    return selected or [original_width]
+
+
+def generate_derivatives(source_root, output_dir, relative_path, widths, formats):
+    """
+    为一张图片生成所有尺寸和格式的衍生图（在子进程中运行）
+    返回清单条目（不含哈希）
+    """
+    source = os.path.join(source_root, relative_path)
+    stem = os.path.splitext(relative_path)[0].replace('/', '_')
+    variants = {name: [] for name in formats}
+
+    with Image.open(source) as image:
+        image.load()
+        original_width, original_height = image.size
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        rgba = image.convert("RGBA") if has_alpha else image.convert("RGB")
+
+        for width in target_widths(original_width, widths):
+            height = max(1, round(original_height * width / original_width))
+            resized = rgba if width == original_width else rgba.resize((width, height), Image.LANCZOS)
+            for name in formats:
+                spec = FORMATS[name]
+                frame = resized
+                if spec["pil_format"] == "JPEG" and has_alpha:
+                    # JPEG 不支持透明，铺白底
+                    frame = Image.new("RGB", resized.size, (255, 255, 255))
+                    frame.paste(resized, mask=resized.getchannel("A"))
+                filename = f"{stem}-{width}{spec['ext']}"
+                target = os.path.join(output_dir, filename)
+                frame.save(target, spec["pil_format"], **spec["options"])
+                variants[name].append({
+                    "width": width,
+                    "height": height,
+                    "file": filename,
+                    "bytes": os.path.getsize(target),
+                })
+
+    return {
+        "width": original_width,
+        "height": original_height,
+        "bytes": os.path.getsize(source),
+        "variants": variants,
+    }
+
+
+class ImageDerivativeBuilder:
+    def __init__(self, source_dir=None, output_dir=None, widths=None, formats=None,
+                 base_url="", workers=None):
+        """
+        初始化响应式图片生成工具
+
+        Args:
+            source_dir: 站点源码目录，None表示脚本所在目录
+            output_dir: 衍生图输出目录，None表示 <源码目录>/img
+            widths: 目标宽度列表
+            formats: 输出格式列表（webp / jpeg）
+            base_url: 写入 srcset 的路径前缀
+            workers: 并行进程数，None表示CPU核数
+        """
+        self.source_dir = os.path.abspath(source_dir or os.path.dirname(os.path.abspath(__file__)))
+        self.output_dir = os.path.abspath(output_dir or os.path.join(self.source_dir, "img"))
+        self.widths = sorted(set(widths or DEFAULT_WIDTHS))
+        self.formats = formats or list(FORMATS)
+        self.base_url = base_url
+        self.workers = workers or os.cpu_count() or 1
+        self.manifest_path = os.path.join(self.output_dir, MANIFEST_NAME)
+
+    def settings_key(self):
+        """参数变化时缓存失效"""
+        options = {name: FORMATS[name]["options"] for name in self.formats}
+        return json.dumps({"widths": self.widths, "formats": options}, sort_keys=True)
+
+    @staticmethod
+    def output_files(entry):
+        return [v["file"] for variants in entry.get("variants", {}).values() for v in variants]
+
+    def srcset(self, variants):
+        """生成 srcset 属性值"""
+        return ", ".join(f"{self.base_url}{v['file']} {v['width']}w" for v in variants)
+
+    def remove_stale(self, old_entry, new_entry):
+        """删除旧条目中不再生成的文件"""
+        if not old_entry:
+            return
+        keep = set(self.output_files(new_entry))
+        for name in self.output_files(old_entry):
+            if name not in keep:
+                try:
+                    os.remove(os.path.join(self.output_dir, name))
+                except OSError:
+                    pass
+
+    def build(self, patterns=None, force=False):
+        """生成衍生图并更新清单，返回 (生成数, 跳过数, 失败数)"""
+        start = datetime.now()
+        os.makedirs(self.output_dir, exist_ok=True)
+        manifest = asset_cache.load_manifest(self.manifest_path, "images")
+        images = manifest.setdefault("images", {})
+        settings = self.settings_key()
+
+        sources = asset_cache.find_sources(self.source_dir, patterns or DEFAULT_SOURCES)
+        if not sources:
+            print("📝 没有找到需要处理的图片")
+            return 0, 0, 0
+
+        pending = {}
+        skipped = 0
+        for relative in sources:
+            digest, _ = asset_cache.hash_file(os.path.join(self.source_dir, relative))
+            if not force and asset_cache.is_cached(images.get(relative), digest, settings,
+                                                   self.output_dir, self.output_files):
+                skipped += 1
+                continue
+            pending[relative] = digest
+
+        print(f"共 {len(sources)} 张图片，{skipped} 张未变化，{len(pending)} 张需要生成 "
+              f"({self.workers} 个进程)")
+
+        generated = failed = 0
+        if pending:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                futures = {
+                    executor.submit(generate_derivatives, self.source_dir, self.output_dir,
+                                    relative, self.widths, self.formats): relative
+                    for relative in pending
+                }
+                for future in as_completed(futures):
+                    relative = futures[future]
+                    try:
+                        entry = future.result()
+                    except Exception as e:
+                        failed += 1
+                        print(f"  ✗ {relative}: {e}")
+                        continue
+                    entry["hash"] = pending[relative]
+                    entry["settings"] = settings
+                    self.remove_stale(images.get(relative), entry)
+                    images[relative] = entry
+                    generated += 1
+                    output_bytes = sum(v[-1]["bytes"] for v in entry["variants"].values())
+                    print(f"  ✓ {relative}: {entry['bytes'] // 1024} KB -> "
+                          f"最大尺寸合计 {output_bytes // 1024} KB")
+
+        # 源文件已删除的条目一并清理
+        for relative in list(images):
+            if relative not in sources and not os.path.exists(os.path.join(self.source_dir, relative)):
+                self.remove_stale(images.pop(relative), {"variants": {}})
+
+        # srcset 只取决于路径前缀，缓存命中的条目也按本次的 base_url 重新生成
+        for entry in images.values():
+            entry["srcset"] = {name: self.srcset(v) for name, v in entry["variants"].items()}
+        manifest["base_url"] = self.base_url
+        manifest["updated_at"] = datetime.now().isoformat(timespec="seconds")
+        asset_cache.save_manifest(self.manifest_path, manifest)
+
+        elapsed = (datetime.now() - start).total_seconds()
+        print(f"✅ 完成: 生成 {generated}, 跳过 {skipped}, 失败 {failed} ({elapsed:.1f}秒)")
+        print(f"清单: {self.manifest_path}")
+        return generated, skipped, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成响应式图片衍生图（WebP/JPEG 多尺寸 + srcset 清单）')
+    parser.add_argument('patterns', nargs='*', help='图片通配符（相对站点根目录），默认处理封面图')
+    parser.add_argument('-s', '--source', help='站点源码目录（默认脚本所在目录）', default=None)
+    parser.add_argument('-o', '--output', help='输出目录（默认 <源码目录>/img）', default=None)
+    parser.add_argument('-w', '--widths', help='目标宽度，逗号分隔', default=None)
+    parser.add_argument('-f', '--formats', help='输出格式，逗号分隔 (webp,jpeg)', default=None)
+    parser.add_argument('-b', '--base-url', help='srcset 路径前缀，例如 img/', default="img/")
+    parser.add_argument('-j', '--jobs', type=int, help='并行进程数（默认CPU核数）', default=None)
+    parser.add_argument('--force', action='store_true', help='忽略缓存，全部重新生成')
+
+    args = parser.parse_args()
+
+    try:
+        widths = [int(w) for w in args.widths.split(',')] if args.widths else None
+    except ValueError:
+        print(f"❌ 无效的宽度列表: {args.widths}")
+        sys.exit(1)
+    formats = args.formats.split(',') if args.formats else None
+    for name in formats or []:
+        if name not in FORMATS:
+            print(f"❌ 不支持的格式: {name}（可选: {', '.join(FORMATS)}）")
+            sys.exit(1)
+
+    builder = ImageDerivativeBuilder(
+        source_dir=args.source,
+        output_dir=args.output,
+        widths=widths,
+        formats=formats,
+        base_url=args.base_url,
+        workers=args.jobs
+    )
+
+    try:
+        _, _, failed = builder.build(patterns=args.patterns or None, force=args.force)
+        sys.exit(1 if failed else 0)
+    except KeyboardInterrupt:
+        print("\n\n👋 用户中断操作")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -5,77 +5,568 @@ import subprocess
 import time
 import sys
 import os
+import re
+import json
+import shutil
+import argparse
+import logging
+import tempfile
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
-def run_git_pull():
-    """执行 git pull origin main 命令"""
+import auto_log
+import content_store
+
+# 复用 auto-build.py 的引用解析，判断根目录资源被哪些游戏引用
+AUTO_BUILD_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "auto-build.py")
+_auto_build = None
+
+# 匹配 SSH 远程地址：ssh://[user@]host[:port]/path 或 [user@]host:path
+SSH_URL_PATTERN = re.compile(r"^ssh://(?:(?P<user>[^@/]+)@)?(?P<host>[^:/]+)(?::(?P<port>\d+))?/")
+SCP_URL_PATTERN = re.compile(r"^(?:(?P<user>[^@/]+)@)?(?P<host>[^:/]+):(?!//)")
+
+# 部署钩子配置（仓库根目录），键为游戏目录名，"site" 表示根目录页面和资源
+HOOKS_FILE = "deploy-hooks.json"
+SITE_KEY = "site"
+
+# 每次拉取的结果写入 ~/.auto-logs/auto-pull-<仓库>-<哈希>.jsonl，便于长期无人值守时查看
+# （main() 中调用 auto_log.setup）
+log = logging.getLogger("auto-pull")
+
+
+def open_offload_repo(repo_path, store_override=None, jobs=8):
+    """按配置打开外置大文件仓库；未配置存储时返回 None"""
+    location = content_store.configured_store(repo_path, store_override)
+    if not location:
+        return None
+    return content_store.OffloadRepo(repo_path, content_store.open_store(location), jobs=jobs)
+
+
+def get_head(repo_path, env=None):
+    """返回当前 HEAD 提交，空仓库或出错时返回 None"""
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--verify', '-q', 'HEAD'], capture_output=True,
+                                text=True, cwd=repo_path, env=env, stdin=subprocess.DEVNULL)
+    except OSError:
+        return None
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def is_game_dir(repo_path, name, revisions):
+    """游戏目录：任一版本中包含 index.html 的根目录子目录（与 auto-build.py 一致）"""
+    if name.startswith('.'):
+        return False
+    for rev in revisions:
+        if rev and subprocess.run(['git', 'cat-file', '-e', f'{rev}:{name}/index.html'],
+                                  capture_output=True, cwd=repo_path,
+                                  stdin=subprocess.DEVNULL).returncode == 0:
+            return True
+    return False
+
+
+def load_auto_build():
+    """按文件路径加载 auto-build.py（文件名带连字符，不能直接 import），不存在时返回 None"""
+    global _auto_build
+    if _auto_build is None and os.path.isfile(AUTO_BUILD_SCRIPT):
+        spec = importlib.util.spec_from_file_location("auto_build", AUTO_BUILD_SCRIPT)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _auto_build = module
+    return _auto_build
+
+
+def games_using(repo_path, root_paths):
+    """
+    找出引用了这些根目录文件的游戏（游戏页面用站点绝对地址引用根目录的音频、图片等）
+
+    Returns:
+        dict: {游戏目录: [被引用的根目录路径]}
+    """
+    module = load_auto_build()
+    if module is None or not root_paths:
+        return {}
+    builder = module.SiteBuilder(source_dir=repo_path)
+    wanted = set(root_paths)
+    users = {}
+    for game in builder.find_games():
+        found = set()
+        for dirpath, _, filenames in os.walk(os.path.join(builder.source_dir, game)):
+            for filename in filenames:
+                if not filename.endswith(('.html', '.htm')):
+                    continue
+                full_path = os.path.join(dirpath, filename)
+                page = os.path.relpath(full_path, builder.source_dir).replace(os.sep, '/')
+                with open(full_path, 'r', encoding='utf-8', errors='replace') as f:
+                    html = f.read()
+                for match in module.REFERENCE_PATTERN.finditer(html):
+                    # 已删除的文件解析不到，但会记入 missing
+                    builder.missing.clear()
+                    path, _ = builder.resolve_reference(page, match.group(2))
+                    found.update(p for p in [path, *builder.missing] if p in wanted)
+        if found:
+            users[game] = sorted(found)
+    return users
+
+
+def build_change_set(repo_path, old_head, new_head):
+    """
+    计算两次提交之间改动的路径，并按游戏目录分组；
+    被游戏页面引用的根目录文件同时算作该游戏的改动
+
+    Returns:
+        dict: repo, old, new, paths, games {目录: [路径]}, site [根目录路径]
+    """
+    if old_head:
+        command = ['git', 'diff', '--name-only', '-z', '--no-renames', old_head, new_head]
+    else:
+        # 第一次拉取（原来是空仓库）时新提交里的所有文件都算改动
+        command = ['git', 'ls-tree', '-r', '-z', '--name-only', new_head]
+    output = subprocess.run(command, capture_output=True, cwd=repo_path,
+                            stdin=subprocess.DEVNULL, check=True).stdout
+    paths = [p for p in output.decode('utf-8', errors='replace').split('\0') if p]
+
+    games, site = {}, []
+    checked = {}
+    for path in paths:
+        top, sep, _ = path.partition('/')
+        if sep and top not in checked:
+            checked[top] = is_game_dir(repo_path, top, [new_head, old_head])
+        if sep and checked[top]:
+            games.setdefault(top, []).append(path)
+        else:
+            site.append(path)
+    for game, used in games_using(repo_path, site).items():
+        games.setdefault(game, []).extend(used)
+    return {"repo": repo_path, "old": old_head, "new": new_head,
+            "paths": paths, "games": games, SITE_KEY: site}
+
+
+def load_hooks(repo_path, hooks_file=None):
+    """读取部署钩子配置：{"游戏目录": ["命令", ...]}，文件不存在时返回空配置"""
+    path = os.path.join(repo_path, hooks_file or HOOKS_FILE)
+    if not os.path.isfile(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        hooks = json.load(f)
+    return {key: [commands] if isinstance(commands, str) else list(commands)
+            for key, commands in hooks.items()}
+
+
+def run_hooks(change_set, hooks):
+    """
+    只运行受影响的游戏（以及根目录有改动时 "site"）登记的钩子
+    命令在仓库目录下用 shell 执行，改动信息通过环境变量传入
+
+    Returns:
+        bool: 所有钩子都成功
+    """
+    targets = sorted(change_set["games"])
+    if change_set[SITE_KEY]:
+        targets.append(SITE_KEY)
+    success = True
+    for target in targets:
+        commands = hooks.get(target)
+        if not commands:
+            continue
+        paths = change_set[SITE_KEY] if target == SITE_KEY else change_set["games"][target]
+        env = dict(os.environ,
+                   AUTO_PULL_TARGET=target,
+                   AUTO_PULL_OLD=change_set["old"] or "",
+                   AUTO_PULL_NEW=change_set["new"],
+                   AUTO_PULL_PATHS="\n".join(paths))
+        for command in commands:
+            log.info("  🚀 [%s] %s", target, command, extra=auto_log.KEEP)
+            # 钩子直接写终端，先写出队列里的日志
+            auto_log.flush()
+            start = time.perf_counter()
+            completed = subprocess.run(command, shell=True, cwd=change_set["repo"], env=env,
+                                       stdin=subprocess.DEVNULL)
+            elapsed = time.perf_counter() - start
+            if completed.returncode != 0:
+                log.error("  ✗ [%s] 返回码 %d，跳过该目标剩余的钩子", target, completed.returncode,
+                          extra=auto_log.fields(command=command, elapsed=round(elapsed, 2)))
+                success = False
+                break
+            log.info("  ✓ [%s] 完成 (%.1fs)", target, elapsed,
+                     extra=auto_log.keep_fields(command=command, elapsed=round(elapsed, 2)))
+    auto_log.flush()
+    return success
+
+
+def write_change_sets(change_sets, destination):
+    """把改动集合写成 JSON，destination 为 "-" 时输出到标准输出"""
+    document = json.dumps({"generated": datetime.now().isoformat(timespec='seconds'),
+                           "repos": change_sets}, ensure_ascii=False, indent=2)
+    if destination == "-":
+        print(document)
+        return
+    tmp_path = destination + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(document + "\n")
+    os.replace(tmp_path, destination)
+
+
+def pull_repo(repo_path=None, remote='origin', branch='main', env=None, offload_store=None):
+    """
+    在指定仓库执行 git pull，不打印输出，便于并发执行后统一汇总
+
+    Returns:
+        dict: repo, success, updated, returncode, stdout, stderr, elapsed, fetched, changes
+    """
+    repo_path = repo_path or os.getcwd()
+    start = time.perf_counter()
+    result = {"repo": repo_path, "success": False, "updated": False, "returncode": None,
+              "stdout": "", "stderr": "", "fetched": 0, "changes": None}
     try:
-        # 执行 git pull 命令
-        result = subprocess.run(
-            ['git', 'pull', 'origin', 'main'],
+        old_head = get_head(repo_path, env)
+        offload = open_offload_repo(repo_path, offload_store)
+        if offload:
+            # 先取回上游提交，把会被合并改动的大文件恢复成指针
+            fetched = subprocess.run(['git', 'fetch', remote, branch], capture_output=True,
+                                     text=True, cwd=repo_path, env=env, stdin=subprocess.DEVNULL)
+            if fetched.returncode == 0:
+                offload.release("FETCH_HEAD")
+        completed = subprocess.run(
+            ['git', 'pull', remote, branch],
             capture_output=True,
             text=True,
-            cwd=os.getcwd()  # 在当前目录执行
+            cwd=repo_path,
+            env=env,
+            stdin=subprocess.DEVNULL
         )
-        
-        # 打印执行时间和结果
-        current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        print(f"\n[{current_time}] 执行 git pull origin main")
-        print(f"返回码: {result.returncode}")
-        
-        if result.stdout:
-            print("输出:", result.stdout.strip())
-        if result.stderr:
-            print("错误:", result.stderr.strip())
-        
-        # 判断是否成功
-        if result.returncode == 0:
-            if "Already up to date" in result.stdout:
-                print("✅ 已经是最新版本")
-                return True
-            else:
-                print("✅ 拉取成功，有更新")
-                return True
-        else:
-            print("❌ 拉取失败")
-            return False
-            
+        result.update(returncode=completed.returncode,
+                      stdout=completed.stdout.strip(),
+                      stderr=completed.stderr.strip(),
+                      success=completed.returncode == 0)
+        result["updated"] = result["success"] and "Already up to date" not in completed.stdout
+        if result["success"] and offload:
+            # 拉取成功后取回外置的大文件，失败按拉取失败处理以便重试
+            result["fetched"], _, failures = offload.hydrate()
+            if failures:
+                result["success"] = False
+                result["stderr"] = "\n".join([result["stderr"], "大文件取回失败:"] + failures).strip()
+        if result["success"]:
+            new_head = get_head(repo_path, env)
+            if new_head and new_head != old_head:
+                result["changes"] = build_change_set(repo_path, old_head, new_head)
     except Exception as e:
-        print(f"❌ 执行出错: {e}")
+        result["stderr"] = str(e)
+    result["elapsed"] = time.perf_counter() - start
+    changes = result["changes"]
+    log.info("git pull %s: %s", repo_path, "成功" if result["success"] else "失败",
+             extra=auto_log.file_only(repo=repo_path, success=result["success"],
+                                      updated=result["updated"], returncode=result["returncode"],
+                                      elapsed=round(result["elapsed"], 2), fetched=result["fetched"],
+                                      games=sorted(changes["games"]) if changes else [],
+                                      error=None if result["success"] else result["stderr"]))
+    return result
+
+
+def run_git_pull(repo_path=None, remote='origin', branch='main', env=None, offload_store=None):
+    """执行 git pull origin main 命令"""
+    result = pull_repo(repo_path, remote, branch, env, offload_store)
+    return print_pull_result(result, remote, branch)
+
+
+def print_pull_result(result, remote='origin', branch='main'):
+    """按单仓库模式打印拉取结果，返回是否成功"""
+    # 打印执行时间和结果
+    current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    print(f"\n[{current_time}] 执行 git pull {remote} {branch}")
+    if result["returncode"] is None:
+        print(f"❌ 执行出错: {result['stderr']}")
         return False
+    print(f"返回码: {result['returncode']}")
+
+    if result["stdout"]:
+        print("输出:", result["stdout"])
+    if result["stderr"]:
+        print("错误:", result["stderr"])
+    if result["fetched"]:
+        print(f"📦 已取回 {result['fetched']} 个大文件")
+    if result["changes"]:
+        changes = result["changes"]
+        games = ", ".join(sorted(changes["games"])) or "无"
+        print(f"📝 改动 {len(changes['paths'])} 个文件，涉及游戏: {games}"
+              + ("，以及根目录文件" if changes[SITE_KEY] else ""))
+
+    # 判断是否成功
+    if result["success"]:
+        if result["updated"]:
+            print("✅ 拉取成功，有更新")
+        else:
+            print("✅ 已经是最新版本")
+        return True
+    print("❌ 拉取失败")
+    return False
+
+
+def parse_ssh_target(url):
+    """从远程地址解析 (user, host, port)，不是 SSH 地址时返回 None"""
+    match = SSH_URL_PATTERN.match(url)
+    if not match:
+        if "://" in url or os.path.exists(url):
+            return None
+        match = SCP_URL_PATTERN.match(url)
+        # 单个字母的"主机"是 Windows 盘符
+        if not match or len(match.group("host")) == 1:
+            return None
+    return match.group("user"), match.group("host"), match.groupdict().get("port")
+
+
+class SSHMultiplexer:
+    """
+    为每个 SSH 主机建立一条共享的主连接（OpenSSH ControlMaster）
+
+    各仓库的 git 进程通过 GIT_SSH_COMMAND 复用主连接，省去重复的握手。
+    主连接建立失败（远程不允许、Windows 等）时对应仓库按普通方式连接。
+    """
+
+    def __init__(self, persist=120):
+        self.persist = persist
+        self.control_dir = None
+        self.masters = {}
+
+    @staticmethod
+    def available():
+        # Windows 自带的 OpenSSH 不支持 ControlMaster；用户自定义了 SSH 命令时不干预
+        return (sys.platform != 'win32' and shutil.which("ssh") is not None
+                and "GIT_SSH_COMMAND" not in os.environ and "GIT_SSH" not in os.environ)
+
+    def control_options(self):
+        # %C 是连接参数的哈希，路径较短，不会超过 Unix 套接字长度限制
+        return ["-o", f"ControlPath={self.control_dir}/%C",
+                "-o", f"ControlPersist={self.persist}"]
+
+    @staticmethod
+    def destination(target):
+        user, host, port = target
+        args = ["-p", port] if port else []
+        return args + [f"{user}@{host}" if user else host]
+
+    def start(self, target):
+        """建立主连接，成功返回 True"""
+        if target in self.masters:
+            return self.masters[target]
+        if self.control_dir is None:
+            self.control_dir = tempfile.mkdtemp(prefix="ap-ssh-")
+        cmd = (["ssh", "-o", "ControlMaster=yes", "-o", "BatchMode=yes", "-N", "-f"]
+               + self.control_options() + self.destination(target))
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30,
+                                    stdin=subprocess.DEVNULL)
+            ok = result.returncode == 0
+        except (subprocess.TimeoutExpired, OSError):
+            ok = False
+        self.masters[target] = ok
+        host = target[1]
+        print(f"  {'🔗 已建立共享连接' if ok else '⚠ 无法建立共享连接，按普通方式连接'}: {host}")
+        return ok
+
+    def env_for(self, target):
+        """返回复用主连接的环境变量；不可复用时返回 None"""
+        if target is None or not self.masters.get(target):
+            return None
+        env = dict(os.environ)
+        env["GIT_SSH_COMMAND"] = " ".join(["ssh", "-o", "ControlMaster=auto"] + self.control_options())
+        return env
+
+    def close(self):
+        for target, ok in self.masters.items():
+            if ok:
+                subprocess.run(["ssh", "-O", "exit"] + self.control_options() + self.destination(target),
+                               capture_output=True, stdin=subprocess.DEVNULL)
+        self.masters.clear()
+        if self.control_dir:
+            shutil.rmtree(self.control_dir, ignore_errors=True)
+            self.control_dir = None
+
+
+def get_remote_url(repo_path, remote):
+    try:
+        result = subprocess.run(['git', 'remote', 'get-url', remote], capture_output=True,
+                                text=True, cwd=repo_path, stdin=subprocess.DEVNULL)
+    except OSError:
+        return None
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def collect_repos(paths, repos_file=None, scan_dirs=None):
+    """合并命令行路径、列表文件和扫描目录，去重后返回绝对路径"""
+    repos = list(paths or [])
+    if repos_file:
+        with open(repos_file, 'r', encoding='utf-8') as f:
+            repos += [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    for scan_dir in scan_dirs or []:
+        for name in sorted(os.listdir(scan_dir)):
+            path = os.path.join(scan_dir, name)
+            if os.path.isdir(os.path.join(path, '.git')):
+                repos.append(path)
+    seen = []
+    for repo in repos:
+        repo = os.path.abspath(os.path.expanduser(repo))
+        if repo not in seen:
+            seen.append(repo)
+    return seen
+
+
+def pull_many(repos, remote='origin', branch='main', jobs=8, multiplex=True, offload_store=None):
+    """用有界线程池并发拉取多个仓库，返回按输入顺序排列的结果"""
+    mux = SSHMultiplexer() if multiplex and SSHMultiplexer.available() else None
+    targets = {}
+    try:
+        for repo in repos:
+            url = get_remote_url(repo, remote)
+            targets[repo] = parse_ssh_target(url) if url else None
+        if mux:
+            for target in sorted({t for t in targets.values() if t}, key=str):
+                mux.start(target)
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(repos)))) as executor:
+            futures = {
+                executor.submit(pull_repo, repo, remote, branch,
+                                mux.env_for(targets[repo]) if mux else None, offload_store): repo
+                for repo in repos
+            }
+            for future in as_completed(futures):
+                result = future.result()
+                results[result["repo"]] = result
+                status = "✅" if result["success"] else "❌"
+                print(f"  {status} {os.path.basename(result['repo'])} ({result['elapsed']:.1f}秒)")
+        return [results[repo] for repo in repos]
+    finally:
+        if mux:
+            mux.close()
+
+
+def print_summary(results, wall_time):
+    """打印每个仓库的结果和耗时"""
+    print("\n" + "=" * 50)
+    print("拉取结果汇总")
+    print("=" * 50)
+    width = max(len(os.path.basename(r["repo"])) for r in results)
+    for result in results:
+        if not result["success"]:
+            status = "❌ 失败"
+        elif result["updated"]:
+            status = "✅ 有更新"
+        else:
+            status = "✅ 已是最新"
+        print(f"  {os.path.basename(result['repo']):<{width}}  {status:<8} {result['elapsed']:6.1f}秒")
+        if not result["success"] and result["stderr"]:
+            print(f"      错误: {result['stderr'].splitlines()[-1][:100]}")
+    total = sum(r["elapsed"] for r in results)
+    print(f"\n总耗时 {wall_time:.1f}秒（逐个执行约需 {total:.1f}秒）")
+
 
 def main():
     """主函数：每5分钟尝试一次，直到成功"""
+    parser = argparse.ArgumentParser(description='Git Pull 自动重试脚本（支持多仓库并发）')
+    parser.add_argument('repos', nargs='*', help='仓库路径（默认当前目录）')
+    parser.add_argument('-f', '--repos-file', help='仓库列表文件，每行一个路径', default=None)
+    parser.add_argument('-s', '--scan', action='append', help='扫描目录下的所有仓库（可重复）', default=None)
+    parser.add_argument('-j', '--jobs', type=int, help='最大并发数', default=8)
+    parser.add_argument('--remote', help='远程名称', default='origin')
+    parser.add_argument('--branch', help='分支名称', default='main')
+    parser.add_argument('-w', '--wait', type=int, help='失败后重试等待时间（秒）', default=300)
+    parser.add_argument('-r', '--retries', type=int, help='最大尝试轮数（默认无限）', default=None)
+    parser.add_argument('--offload-store', default=None,
+                        help='大文件存储：本地目录或 http(s) 地址（默认读取 git config offload.store）')
+    parser.add_argument('--no-multiplex', action='store_true', help='不复用 SSH 连接')
+    parser.add_argument('--changes', metavar='FILE', default=None,
+                        help='把改动集合（路径、涉及的游戏目录）写成 JSON，"-" 表示标准输出')
+    parser.add_argument('--hooks', metavar='FILE', nargs='?', const=HOOKS_FILE, default=None,
+                        help=f'拉取成功后只为有改动的游戏运行部署钩子（默认读取仓库中的 {HOOKS_FILE}）')
+
+    args = parser.parse_args()
+
+    # 只给出一个（或没有）仓库时保持原来的单仓库行为
+    single = len(args.repos) <= 1 and not args.repos_file and not args.scan
+    repos = collect_repos(args.repos, args.repos_file, args.scan)
+
+    # 日志按仓库（多仓库时按列表文件或扫描目录）区分，同时运行的多个进程不共用文件
+    log_key = args.repos_file or (args.scan[0] if args.scan else None) \
+        or (repos[0] if repos else os.getcwd())
+    auto_log.setup("auto-pull", auto_log.log_file_for("auto-pull", log_key))
+
     print("=" * 50)
     print("Git Pull 自动重试脚本")
-    print("每5分钟尝试一次，直到成功")
+    if single:
+        print(f"每{args.wait // 60}分钟尝试一次，直到成功")
+    else:
+        print(f"共 {len(repos)} 个仓库，最多 {args.jobs} 个并发，失败的仓库每{args.wait // 60}分钟重试")
     print("按 Ctrl+C 退出")
     print("=" * 50)
-    
+
+    if not single and not repos:
+        print("📝 没有找到仓库")
+        sys.exit(0)
+
     attempt_count = 0
-    
+    pending = repos
+    final_results = {}
+
     while True:
         attempt_count += 1
         print(f"\n--- 第 {attempt_count} 次尝试 ---")
-        
-        # 执行 git pull
-        success = run_git_pull()
-        
+
+        if single:
+            # 执行 git pull
+            result = pull_repo(pending[0] if pending else None, args.remote, args.branch,
+                               offload_store=args.offload_store)
+            final_results[result["repo"]] = result
+            success = print_pull_result(result, args.remote, args.branch)
+        else:
+            start = time.perf_counter()
+            results = pull_many(pending, args.remote, args.branch, args.jobs,
+                                multiplex=not args.no_multiplex, offload_store=args.offload_store)
+            final_results.update((r["repo"], r) for r in results)
+            print_summary([final_results[repo] for repo in repos], time.perf_counter() - start)
+            pending = [r["repo"] for r in results if not r["success"]]
+            success = not pending
+
         # 如果成功，退出循环
         if success:
             print("\n🎉 成功拉取代码！脚本结束。")
             break
-        
-        # 等待5分钟（300秒）
-        next_time = datetime.now().timestamp() + 300
+
+        if args.retries is not None and attempt_count >= args.retries:
+            print(f"\n❌ 已达到最大尝试次数 ({args.retries})")
+            sys.exit(1)
+
+        # 等待后重试
+        next_time = datetime.now().timestamp() + args.wait
         next_time_str = datetime.fromtimestamp(next_time).strftime('%H:%M:%S')
-        print(f"⏰ 等待5分钟，下次尝试时间: {next_time_str}")
-        
+        log.info("⏰ 等待%d分钟，下次尝试时间: %s", args.wait // 60, next_time_str, extra=auto_log.KEEP)
+        auto_log.flush()
+
         try:
-            time.sleep(300)  # 300秒 = 5分钟
+            time.sleep(args.wait)
         except KeyboardInterrupt:
             print("\n👋 用户中断，脚本退出")
             sys.exit(0)
 
+    change_sets = [r["changes"] for r in final_results.values() if r["changes"]]
+    if args.changes:
+        write_change_sets(change_sets, args.changes)
+    if args.hooks:
+        if not change_sets:
+            print("📝 没有新的提交，不运行部署钩子")
+        hooks_ok = True
+        for change_set in change_sets:
+            print(f"\n🚀 部署钩子: {change_set['repo']}")
+            try:
+                hooks = load_hooks(change_set["repo"], args.hooks)
+            except (OSError, ValueError) as e:
+                print(f"  ✗ 读取钩子配置失败: {e}")
+                hooks_ok = False
+                continue
+            hooks_ok = run_hooks(change_set, hooks) and hooks_ok
+        if not hooks_ok:
+            print("\n❌ 部分部署钩子失败")
+            sys.exit(1)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -6,10 +6,693 @@ import time
 import sys
 import os
 import argparse
+import json
+import hashlib
+import uuid
+import re
+import logging
+from queue import Queue, Empty
+import signal
+import threading
+from collections import deque
 from datetime import datetime
 
+import auto_log
+import content_store
+
+try:
+    from dulwich import porcelain
+    from dulwich.repo import Repo as DulwichRepo
+except ImportError:
+    porcelain = None
+    DulwichRepo = None
+
+# 写后镜像模式的默认状态目录：出站队列、本地裸镜像和复制器日志都放在这里
+STATE_DIR = os.path.join(os.path.expanduser("~"), ".auto-push")
+DEFAULT_QUEUE_FILE = os.path.join(STATE_DIR, "queue.json")
+
+# git 输出和倒计时只刷新终端状态行，完整记录按仓库写入 ~/.auto-logs/auto-push-<仓库>-<哈希>.jsonl
+# （main() 中调用 auto_log.setup）
+log = logging.getLogger("auto-push")
+
+
+def _lock_file(fh, blocking=True):
+    """对已打开的文件加排他锁，进程退出时系统会自动释放"""
+    try:
+        if sys.platform == 'win32':
+            import msvcrt
+            fh.seek(0)
+            mode = msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK
+            msvcrt.locking(fh.fileno(), mode, 1)
+        else:
+            import fcntl
+            flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+            fcntl.flock(fh.fileno(), flags)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock_file(fh):
+    """释放 _lock_file 加的锁"""
+    try:
+        if sys.platform == 'win32':
+            import msvcrt
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+    except OSError:
+        pass
+
+
+# git --progress 输出，例如 "Writing objects:  45% (9/20), 1.20 MiB | 2.40 MiB/s"
+GIT_PROGRESS_PATTERN = re.compile(
+    r"^(?:remote:\s*)?(?P<phase>[A-Za-z][A-Za-z ]*?):\s+(?P<percent>\d+)%\s+\((?P<done>\d+)/(?P<total>\d+)\)"
+    r"(?:,\s*(?P<size>[\d.]+)\s*(?P<size_unit>[KMG]i?B|bytes))?"
+    r"(?:\s*\|\s*(?P<rate>[\d.]+)\s*(?P<rate_unit>[KMG]i?B|bytes)/s)?"
+)
+
+_UNIT_BYTES = {"bytes": 1, "KiB": 1024, "MiB": 1024 ** 2, "GiB": 1024 ** 3,
+               "KB": 1000, "MB": 1000 ** 2, "GB": 1000 ** 3}
+
+
+def parse_git_progress(line):
+    """把一行 git 进度输出解析为事件字典，不是进度行时返回 None"""
+    match = GIT_PROGRESS_PATTERN.match(line.strip())
+    if not match:
+        return None
+    event = {
+        "phase": match.group("phase"),
+        "percent": int(match.group("percent")),
+        "done": int(match.group("done")),
+        "total": int(match.group("total")),
+        "bytes": None,
+        "rate": None,
+    }
+    if match.group("size"):
+        event["bytes"] = float(match.group("size")) * _UNIT_BYTES[match.group("size_unit")]
+    if match.group("rate"):
+        event["rate"] = float(match.group("rate")) * _UNIT_BYTES[match.group("rate_unit")]
+    return event
+
+
+def _format_bytes(value):
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if value < 1024 or unit == "GiB":
+            return f"{value:.1f} {unit}" if unit != "B" else f"{int(value)} B"
+        value /= 1024
+
+
+class ProgressDisplay:
+    """在终端同一行显示传输进度、速率和预计剩余时间"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.live = hasattr(self.stream, "isatty") and self.stream.isatty()
+        self.last_phase = None
+        self.width = 0
+
+    def eta(self, event):
+        """按已传字节和百分比估算剩余时间（秒）"""
+        if not event["rate"] or not event["bytes"] or not event["percent"]:
+            return None
+        total_bytes = event["bytes"] * 100 / event["percent"]
+        return max(0, (total_bytes - event["bytes"]) / event["rate"])
+
+    def update(self, event):
+        text = f"  ⇡ {event['phase']} {event['percent']}% ({event['done']}/{event['total']})"
+        if event["bytes"] is not None:
+            text += f" {_format_bytes(event['bytes'])}"
+        if event["rate"]:
+            text += f" @ {_format_bytes(event['rate'])}/s"
+        eta = self.eta(event)
+        if eta is not None and event["percent"] < 100:
+            mins, secs = divmod(int(eta), 60)
+            text += f" 剩余 {mins:02d}:{secs:02d}"
+        if self.live:
+            self.stream.write("\r" + text.ljust(self.width))
+            self.width = len(text)
+            if event["percent"] >= 100:
+                self.stream.write("\n")
+                self.width = 0
+            self.stream.flush()
+        elif event["percent"] >= 100 and event["phase"] != self.last_phase:
+            # 非终端（例如日志文件）只记录每个阶段的完成行
+            print(text)
+        if event["percent"] >= 100:
+            self.last_phase = event["phase"]
+
+    def finish(self):
+        if self.live and self.width:
+            self.stream.write("\n")
+            self.stream.flush()
+            self.width = 0
+
+
+def _kill_process_tree(process, own_group=False):
+    """
+    结束进程及其子进程（shell=True 时 git 是 shell 的子进程，git 之下还有 ssh/git-remote-https）
+    own_group: 进程是自己进程组的组长，可以整组结束
+    """
+    try:
+        if sys.platform == 'win32':
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)],
+                           capture_output=True)
+        elif own_group:
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (OSError, subprocess.SubprocessError):
+        process.kill()
+
+
+def _controlling_terminal():
+    """本进程是终端的前台进程组时返回终端的文件描述符，否则返回 None"""
+    if sys.platform == 'win32':
+        return None
+    try:
+        fd = sys.stdin.fileno()
+        if os.isatty(fd) and os.tcgetpgrp(fd) == os.getpgrp():
+            return fd
+    except (AttributeError, OSError, ValueError):
+        pass
+    return None
+
+
+def _set_foreground(fd, pgid):
+    """把终端的前台进程组切换为 pgid；本进程此时可能在后台，先屏蔽 SIGTTOU"""
+    blocked = signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGTTOU})
+    try:
+        os.tcsetpgrp(fd, pgid)
+    except OSError:
+        pass
+    finally:
+        signal.pthread_sigmask(signal.SIG_SETMASK, blocked)
+
+
+def stream_command(command, cwd=None, timeout=None, stall_timeout=None, cancel_event=None,
+                   on_line=None, on_progress=None, stderr_tail=200, detached=False):
+    """
+    以流式方式执行命令，逐行读取 stdout/stderr
+
+    git 的进度行以回车符结尾，也按行切分，解析成功的交给 on_progress，
+    其余交给 on_line(流名称, 行)。stderr 只保留最后 stderr_tail 行，避免长时间传输占用内存。
+
+    Args:
+        timeout: 整个命令的超时（秒）
+        stall_timeout: 连续无输出的超时（秒），用于发现卡住的传输
+        cancel_event: threading.Event，被设置时结束命令
+        detached: 在新会话中运行（后台复制器使用）；前台运行时命令在自己的进程组中，
+                  并成为终端的前台进程组，git/ssh 仍能提示输入用户名、密码或口令。
+                  两种方式超时或取消时都整组结束，不会等待残留的 ssh 等子进程
+
+    Returns:
+        (返回码, stdout文本, stderr文本)；超时或取消时返回码为 None
+    """
+    kwargs = {}
+    own_group = sys.platform != 'win32'
+    terminal = None
+    if detached and own_group:
+        kwargs["start_new_session"] = True
+    elif own_group:
+        terminal = _controlling_terminal()
+        if sys.version_info >= (3, 11):
+            kwargs["process_group"] = 0
+        else:
+            kwargs["preexec_fn"] = os.setpgrp
+    process = subprocess.Popen(
+        command,
+        shell=isinstance(command, str),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        stdin=subprocess.DEVNULL if detached else None,
+        cwd=cwd,
+        **kwargs
+    )
+    if terminal is not None:
+        _set_foreground(terminal, process.pid)
+        # 切换前子进程若已读终端会被 SIGTTIN 停住，让它继续
+        os.killpg(process.pid, signal.SIGCONT)
+
+    lines = Queue()
+
+    def reader(name, pipe):
+        buffer = b""
+        for chunk in iter(lambda: pipe.read1(65536) if hasattr(pipe, "read1") else pipe.read(4096), b""):
+            buffer += chunk
+            parts = re.split(rb"\r\n|\r|\n", buffer)
+            buffer = parts.pop()
+            for part in parts:
+                lines.put((name, part.decode('utf-8', errors='replace')))
+        if buffer:
+            lines.put((name, buffer.decode('utf-8', errors='replace')))
+        lines.put((name, None))
+
+    threads = [threading.Thread(target=reader, args=(name, pipe), daemon=True)
+               for name, pipe in (("stdout", process.stdout), ("stderr", process.stderr))]
+    for thread in threads:
+        thread.start()
+
+    stdout_lines = []
+    stderr_lines = deque(maxlen=stderr_tail)
+    open_streams = 2
+    start = last_output = time.monotonic()
+    failure = None
+    try:
+        while open_streams:
+            try:
+                name, line = lines.get(timeout=0.2)
+            except Empty:
+                now = time.monotonic()
+                if cancel_event is not None and cancel_event.is_set():
+                    failure = "命令已取消"
+                elif timeout is not None and now - start > timeout:
+                    failure = f"Timeout: 命令超过 {timeout} 秒未完成"
+                elif stall_timeout is not None and now - last_output > stall_timeout:
+                    failure = f"Timeout: 连续 {stall_timeout} 秒没有任何输出，传输可能已卡住"
+                if failure:
+                    _kill_process_tree(process, own_group)
+                    break
+                continue
+            if line is None:
+                open_streams -= 1
+                continue
+            last_output = time.monotonic()
+            event = parse_git_progress(line) if name == "stderr" else None
+            if event is not None:
+                if on_progress:
+                    on_progress(event)
+                continue
+            if name == "stdout":
+                stdout_lines.append(line)
+            elif line.strip():
+                stderr_lines.append(line)
+            if on_line:
+                on_line(name, line)
+    except KeyboardInterrupt:
+        _kill_process_tree(process, own_group)
+        raise
+    finally:
+        if terminal is not None:
+            _set_foreground(terminal, os.getpgrp())
+        # 脱离进程组的子进程（例如 ssh ControlMaster）可能仍占着管道：
+        # 读取线程限时等待，未结束的不再关闭管道，交给守护线程
+        deadline = time.monotonic() + 2
+        for thread in threads:
+            thread.join(max(0, deadline - time.monotonic()))
+        if not any(thread.is_alive() for thread in threads):
+            process.stdout.close()
+            process.stderr.close()
+
+    try:
+        returncode = process.wait(timeout=5 if failure else None)
+    except subprocess.TimeoutExpired:
+        returncode = None
+    if failure:
+        stderr_lines.append(failure)
+        returncode = None
+    elif terminal is not None and returncode in (-signal.SIGINT, 128 + signal.SIGINT):
+        # 命令在前台进程组时 Ctrl+C 只发给了命令本身，这里转交给调用方
+        raise KeyboardInterrupt
+    return returncode, "\n".join(stdout_lines), "\n".join(stderr_lines)
+
+
+def _spawn_detached(cmd, log_path):
+    """以分离的后台进程运行命令，输出追加到 log_path，返回日志路径"""
+    os.makedirs(os.path.dirname(os.path.abspath(log_path)), exist_ok=True)
+    kwargs = {}
+    if sys.platform == 'win32':
+        kwargs["creationflags"] = (subprocess.DETACHED_PROCESS
+                                   | subprocess.CREATE_NEW_PROCESS_GROUP)
+    else:
+        kwargs["start_new_session"] = True
+    with open(log_path, "a", encoding="utf-8") as log:
+        subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT,
+                         stdin=subprocess.DEVNULL, **kwargs)
+    return log_path
+
+
+class OutboundQueue:
+    """
+    持久化的出站推送队列（JSON文件）
+
+    每个条目对应一个 (镜像, 分支) 组合，重复入队只更新提交号，
+    因为推送分支时会一并推送它之前的所有提交。写入采用临时文件+原子替换，
+    进程被杀掉也不会留下半写的队列；多个仓库共享同一个队列文件。
+    """
+
+    def __init__(self, path=None):
+        self.path = path or DEFAULT_QUEUE_FILE
+        self.lock_path = self.path + ".lock"
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+    def _locked(self, func):
+        """在队列锁内执行 func(entries)，func 返回 (新条目列表或None, 结果)"""
+        with open(self.lock_path, "a+") as lock_fh:
+            _lock_file(lock_fh)
+            try:
+                entries = self._read()
+                new_entries, result = func(entries)
+                if new_entries is not None:
+                    self._write(new_entries)
+                return result
+            finally:
+                _unlock_file(lock_fh)
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f).get("entries", [])
+        except (OSError, ValueError) as e:
+            print(f"  ⚠ 读取队列失败: {e}")
+            return []
+
+    def _write(self, entries):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "entries": entries}, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def entries(self):
+        """返回当前所有条目的快照"""
+        return self._locked(lambda entries: (None, list(entries)))
+
+    def enqueue(self, repo, mirror, remote, ref, sha):
+        """加入或更新一个待推送条目"""
+        def update(entries):
+            for entry in entries:
+                if entry["mirror"] == mirror and entry["ref"] == ref:
+                    entry.update(sha=sha, remote=remote, repo=repo, status="pending",
+                                 last_error=None,
+                                 updated_at=datetime.now().isoformat(timespec="seconds"))
+                    return entries, entry
+            entry = {
+                "id": uuid.uuid4().hex[:12],
+                "repo": repo,
+                "mirror": mirror,
+                "remote": remote,
+                "ref": ref,
+                "sha": sha,
+                "status": "pending",
+                "attempts": 0,
+                "last_error": None,
+                "enqueued_at": datetime.now().isoformat(timespec="seconds"),
+                "updated_at": datetime.now().isoformat(timespec="seconds"),
+            }
+            entries.append(entry)
+            return entries, entry
+        return self._locked(update)
+
+    def complete(self, entry_id, sha):
+        """推送成功后移除条目；若期间又有新提交入队（sha已变）则保留"""
+        def update(entries):
+            kept = [e for e in entries if not (e["id"] == entry_id and e["sha"] == sha)]
+            return kept, len(kept) != len(entries)
+        return self._locked(update)
+
+    def record_failure(self, entry_id, error, fatal=False):
+        """记录一次失败；fatal 表示非网络错误，需要人工处理"""
+        def update(entries):
+            for entry in entries:
+                if entry["id"] == entry_id:
+                    entry["attempts"] = entry.get("attempts", 0) + 1
+                    entry["last_error"] = error[:500]
+                    entry["status"] = "failed" if fatal else "pending"
+                    entry["updated_at"] = datetime.now().isoformat(timespec="seconds")
+            return entries, None
+        return self._locked(update)
+
+    def retry_failed(self):
+        """把失败条目重新标记为待推送"""
+        def update(entries):
+            count = 0
+            for entry in entries:
+                if entry["status"] == "failed":
+                    entry["status"] = "pending"
+                    count += 1
+            return entries, count
+        return self._locked(update)
+
+
+class Replicator:
+    """后台复制器：把队列中的镜像分支推送到真正的远程仓库"""
+
+    def __init__(self, queue, wait_time=300, max_retries=None, stall_timeout=60):
+        self.queue = queue
+        self.wait_time = wait_time
+        self.max_retries = max_retries
+        # 复用 GitAutoPush 的命令执行与网络错误判断
+        self.git = GitAutoPush(wait_time=wait_time, max_retries=max_retries,
+                               stall_timeout=stall_timeout, detached=True)
+
+    def push_entry(self, entry):
+        """从本地镜像推送一个条目到远程"""
+        ref = entry["ref"]
+        cmd = ["git", "push", "--progress", entry["remote"], f"{ref}:{ref}"]
+        return self.git.run_command(cmd, f"复制 {entry['repo']} ({entry['sha'][:8]}) 到远程",
+                                    cwd=entry["mirror"], progress=True)
+
+    def drain(self):
+        """推送所有待处理条目，返回仍待重试的条目数"""
+        remaining = 0
+        for entry in self.queue.entries():
+            if entry["status"] != "pending":
+                continue
+            success, output = self.push_entry(entry)
+            if success:
+                self.queue.complete(entry["id"], entry["sha"])
+                print(f"  ✨ 已复制: {entry['repo']} -> {entry['remote']}")
+                # 推送到远程成功后，在后台顺带执行该仓库到期的维护任务
+                GitAutoPush(repo_path=entry["repo"], detached=True).scheduled_maintenance()
+                continue
+            network_error = self.git.is_network_error(output)
+            attempts = entry.get("attempts", 0) + 1
+            give_up = not network_error or (
+                self.max_retries is not None and attempts >= self.max_retries)
+            self.queue.record_failure(entry["id"], output, fatal=give_up)
+            if give_up:
+                print(f"  ❌ 复制失败，需要人工处理: {entry['repo']}")
+            else:
+                remaining += 1
+        return remaining
+
+    def run(self):
+        """持有复制器锁，循环清空队列；队列为空时退出"""
+        while True:
+            lock_fh = open(self.queue.path + ".replicator.lock", "a+")
+            if not _lock_file(lock_fh, blocking=False):
+                print("复制器已在运行，本进程退出")
+                lock_fh.close()
+                return True
+            try:
+                print(f"[{datetime.now().strftime('%H:%M:%S')}] 复制器启动，队列: {self.queue.path}")
+                while True:
+                    remaining = self.drain()
+                    if remaining == 0:
+                        if not self.has_pending():
+                            break
+                        # 清空期间有新条目入队，立即再处理一轮
+                        continue
+                    print(f"⚠ 还有 {remaining} 个条目因网络错误待重试，{self.wait_time}秒后重试")
+                    time.sleep(self.wait_time)
+            finally:
+                _unlock_file(lock_fh)
+                lock_fh.close()
+            # 确认队列为空到释放锁之间入队的条目，其启动的复制器会因拿不到锁而退出，
+            # 释放锁后再检查一次，有遗留就重新加锁处理
+            if not self.has_pending():
+                print(f"[{datetime.now().strftime('%H:%M:%S')}] 没有待推送条目，复制器退出")
+                return True
+
+    def has_pending(self):
+        return any(e["status"] == "pending" for e in self.queue.entries())
+
+    @staticmethod
+    def spawn(queue_path, wait_time=300, max_retries=None):
+        """以分离的后台进程启动复制器，输出写入状态目录下的日志"""
+        cmd = [sys.executable, os.path.abspath(__file__), "--replicate",
+               "--queue-file", queue_path, "-w", str(wait_time)]
+        if max_retries is not None:
+            cmd += ["-r", str(max_retries)]
+        log_path = os.path.join(os.path.dirname(os.path.abspath(queue_path)), "replicator.log")
+        return _spawn_detached(cmd, log_path)
+
+
+class DulwichBackend:
+    """
+    进程内 Git 后端（基于 dulwich，可选依赖）
+
+    仓库对象在多次操作之间保持打开，status/add/commit 不再每次启动 git 进程。
+    输出格式与 git status --porcelain 一致，供 GitAutoPush 复用原有的解析逻辑。
+    注意：不会执行 git hooks，也不支持提交签名。
+    """
+
+    def __init__(self, repo_path):
+        if DulwichRepo is None:
+            raise RuntimeError("未安装 dulwich (pip install dulwich)")
+        self.repo = DulwichRepo(repo_path)
+
+    @staticmethod
+    def _decode(path):
+        return path.decode('utf-8', errors='replace') if isinstance(path, bytes) else path
+
+    def _worktree_path(self, path):
+        return os.path.join(self.repo.path, self._decode(path))
+
+    def status_lines(self):
+        """返回 porcelain 格式的状态行"""
+        status = porcelain.status(self.repo)
+        lines = []
+        for code, key in (("A ", "add"), ("M ", "modify"), ("D ", "delete")):
+            lines += [f"{code} {self._decode(p)}" for p in status.staged.get(key, [])]
+        for path in status.unstaged:
+            code = " M" if os.path.lexists(self._worktree_path(path)) else " D"
+            lines.append(f"{code} {self._decode(path)}")
+        lines += [f"?? {self._decode(p)}" for p in status.untracked]
+        return lines
+
+    def add_all(self):
+        """相当于 git add .：暂存新增、修改和删除"""
+        status = porcelain.status(self.repo)
+        porcelain.add(self.repo)
+        removed = [p for p in status.unstaged if not os.path.lexists(self._worktree_path(p))]
+        if removed:
+            index = self.repo.open_index()
+            for path in removed:
+                key = path if isinstance(path, bytes) else path.encode('utf-8')
+                if key in index:
+                    del index[key]
+            index.write()
+        return len(status.untracked) + len(status.unstaged)
+
+    def commit(self, message):
+        """提交暂存区，返回提交号"""
+        sha = porcelain.commit(self.repo, message=message.encode('utf-8'))
+        return self._decode(sha)
+
+    def close(self):
+        self.repo.close()
+
+
+class RepoMaintenance:
+    """
+    仓库维护：让频繁调用的 git status 保持快速
+
+    - 一次性配置：untracked cache、fsmonitor（平台支持内置守护进程时）、commit-graph
+    - 定期任务：按间隔执行 git maintenance 的 commit-graph / loose-objects / incremental-repack，
+      上次执行时间记录在 .git/auto-push-maintenance.json，到期才运行
+    """
+
+    STATE_FILE = "auto-push-maintenance.json"
+
+    # 任务名 -> 执行间隔（秒），与 git maintenance 的 hourly/daily 计划一致
+    TASKS = {
+        "commit-graph": 3600,
+        "loose-objects": 86400,
+        "incremental-repack": 86400,
+    }
+
+    def __init__(self, repo_path):
+        self.repo_path = repo_path
+        result = subprocess.run(["git", "rev-parse", "--absolute-git-dir"], cwd=repo_path,
+                                capture_output=True, text=True, stdin=subprocess.DEVNULL)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or "不是Git仓库")
+        self.state_path = os.path.join(result.stdout.strip(), self.STATE_FILE)
+        self.state = self._load()
+
+    def _load(self):
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def _git(self, args):
+        return subprocess.run(["git"] + args, cwd=self.repo_path, capture_output=True,
+                              text=True, stdin=subprocess.DEVNULL)
+
+    @property
+    def enabled(self):
+        return bool(self.state.get("configured"))
+
+    def fsmonitor_supported(self):
+        """内置 fsmonitor 守护进程只在部分平台（Windows、macOS）和较新的 git 上可用"""
+        result = self._git(["fsmonitor--daemon", "status"])
+        output = (result.stdout + result.stderr).lower()
+        return result.returncode != 128 and "not supported" not in output \
+            and "is not a git command" not in output
+
+    def configure(self):
+        """写入加速 status 的配置，返回 [(项目, 是否启用)]"""
+        applied = []
+        for key, value in (("core.untrackedCache", "true"),
+                           ("core.commitGraph", "true"),
+                           ("fetch.writeCommitGraph", "true")):
+            applied.append((f"{key}={value}", self._git(["config", key, value]).returncode == 0))
+        # 立即在索引中建立 untracked cache，不必等下一次 status
+        applied.append(("update-index --untracked-cache",
+                        self._git(["update-index", "--untracked-cache"]).returncode == 0))
+        if self.fsmonitor_supported():
+            applied.append(("core.fsmonitor=true",
+                            self._git(["config", "core.fsmonitor", "true"]).returncode == 0))
+        else:
+            applied.append(("core.fsmonitor（当前平台不支持，跳过）", False))
+        self.state["configured"] = time.time()
+        self._save()
+        return applied
+
+    def due_tasks(self, now=None):
+        now = now or time.time()
+        last_run = self.state.get("tasks", {})
+        return [task for task, interval in self.TASKS.items()
+                if now - last_run.get(task, 0) >= interval]
+
+    def run_tasks(self, tasks, on_result=None):
+        """执行维护任务，返回是否全部成功"""
+        success = True
+        for task in tasks:
+            start = time.perf_counter()
+            result = self._git(["maintenance", "run", f"--task={task}"])
+            elapsed = time.perf_counter() - start
+            ok = result.returncode == 0
+            if ok:
+                self.state.setdefault("tasks", {})[task] = time.time()
+                self._save()
+            success = success and ok
+            if on_result:
+                on_result(task, ok, elapsed, result.stderr.strip())
+        return success
+
+    def time_status(self, runs=3):
+        """git status --porcelain 的耗时中位数（秒），先预热一次"""
+        self._git(["status", "--porcelain"])
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            self._git(["status", "--porcelain"])
+            samples.append(time.perf_counter() - start)
+        samples.sort()
+        return samples[len(samples) // 2]
+
+
 class GitAutoPush:
-    def __init__(self, repo_path=None, commit_message=None, max_retries=None, wait_time=300):
+    def __init__(self, repo_path=None, commit_message=None, max_retries=None, wait_time=300,
+                 mirror_path=None, queue_file=None, command_timeout=None, stall_timeout=60,
+                 backend="subprocess", offload_store=None, offload_threshold=1024 * 1024,
+                 detached=False):
         """
         初始化Git自动推送工具
         
@@ -18,55 +701,162 @@ class GitAutoPush:
             commit_message: 提交信息，None表示让用户输入
             max_retries: 最大重试次数，None表示无限重试
             wait_time: 重试等待时间（秒），默认300秒（5分钟）
+            mirror_path: 本地裸镜像路径，非None时启用写后镜像模式（空字符串表示默认位置）
+            queue_file: 出站队列文件，None表示使用 ~/.auto-push/queue.json
+            command_timeout: 单条命令的超时（秒），None表示不限
+            stall_timeout: 推送时连续无进度输出的超时（秒），None表示不限
+            backend: status/add/commit 的执行方式：subprocess（git 命令）、
+                     dulwich（进程内）或 auto（已安装 dulwich 时使用进程内）
+            offload_store: 大文件存储（目录或 http(s) 地址），None表示读取 git config offload.store
+            offload_threshold: 超过该字节数的新增/修改文件以指针提交
+            detached: 没有控制终端的后台运行（复制器），命令在新会话中执行
         """
         self.repo_path = repo_path or os.getcwd()
         self.commit_message = commit_message
         self.max_retries = max_retries
         self.wait_time = wait_time
+        self.mirror_path = mirror_path
+        self.queue_file = queue_file or DEFAULT_QUEUE_FILE
+        self.command_timeout = command_timeout
+        self.stall_timeout = stall_timeout
+        self.detached = detached
+        # 当前命令的取消事件，每条命令单独创建，取消只影响正在执行的命令
+        self.cancel_event = None
+        self.backend_name = backend
+        self._backend = None
+        self.offload_store = offload_store
+        self.offload_threshold = offload_threshold
         
-    def run_command(self, command, description, cwd=None):
-        """执行命令并返回结果"""
+    def run_command(self, command, description, cwd=None, progress=False, timeout=None):
+        """
+        执行命令并返回结果
+
+        输出边读边显示；progress 为 True 时把 git 进度显示为实时的速率和剩余时间
+        """
         working_dir = cwd or self.repo_path
         print(f"[{datetime.now().strftime('%H:%M:%S')}] {description}...")
+        display = ProgressDisplay() if progress else None
+        cancel_event = self.cancel_event = threading.Event()
+
+        def on_line(name, line):
+            if name == "stdout" and line.strip():
+                log.info("  ✓ %s", line, extra=auto_log.fields(command=description))
+
         try:
-            result = subprocess.run(
-                command, 
-                shell=True, 
-                capture_output=True, 
-                text=True, 
-                encoding='utf-8',
-                cwd=working_dir
+            returncode, stdout, stderr = stream_command(
+                command,
+                cwd=working_dir,
+                timeout=timeout if timeout is not None else self.command_timeout,
+                stall_timeout=self.stall_timeout if progress else None,
+                cancel_event=cancel_event,
+                on_line=on_line,
+                on_progress=display.update if display else None,
+                detached=self.detached,
             )
-            if result.returncode == 0:
-                if result.stdout and result.stdout.strip():
-                    for line in result.stdout.strip().split('\n'):
-                        if line.strip():
-                            print(f"  ✓ {line}")
-                return True, result.stdout
-            else:
-                error_msg = result.stderr.strip() if result.stderr else "未知错误"
-                print(f"  ✗ 失败: {error_msg}")
-                return False, error_msg
         except Exception as e:
-            print(f"  ✗ 异常: {str(e)}")
+            log.error("  ✗ 异常: %s", e, extra=auto_log.fields(command=description))
+            auto_log.flush()
             return False, str(e)
+        finally:
+            # 命令结束后写出队列里的输出，保证与后面的 print 顺序一致
+            auto_log.flush()
+            if display:
+                display.finish()
+
+        if returncode == 0:
+            return True, stdout
+        error_msg = stderr.strip() if stderr else "未知错误"
+        log.error("  ✗ 失败: %s", error_msg,
+                  extra=auto_log.fields(command=description, returncode=returncode))
+        auto_log.flush()
+        return False, error_msg
+    
+    def cancel(self):
+        """取消正在执行的命令（可从其他线程调用）"""
+        event = self.cancel_event
+        if event is not None:
+            event.set()
     
     def check_repository(self):
         """检查指定路径是否是Git仓库"""
         print(f"\n📂 仓库路径: {self.repo_path}")
-        return self.run_command("git rev-parse --git-dir", "检查Git仓库")
+        return self.run_command(["git", "rev-parse", "--git-dir"], "检查Git仓库")
+    
+    def offload_location(self):
+        """返回配置的大文件存储位置，未配置时返回 None"""
+        location = content_store.configured_store(self.repo_path, self.offload_store)
+        if location and self.backend_name != "subprocess":
+            # dulwich 不认 skip-worktree，会把工作区的真实内容重新暂存，覆盖指针
+            print("  ⚠ 已配置大文件存储，status/add/commit 改用 git 命令")
+            self.backend_name = "subprocess"
+            if self._backend is not None:
+                self._backend.close()
+                self._backend = None
+        return location
+
+    def offload_large_files(self, location):
+        """把超过阈值的文件上传到内容寻址存储，并以指针文件暂存"""
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] 检查大文件（>{self.offload_threshold // 1024} KB）...")
+        try:
+            repo = content_store.OffloadRepo(self.repo_path, content_store.open_store(location))
+            offloaded = repo.offload(self.offload_threshold)
+        except Exception as e:
+            print(f"  ✗ 大文件外置失败: {e}")
+            return False
+        for path, size in offloaded:
+            print(f"  📦 {path} ({size / 1024 / 1024:.1f} MB) -> {location}")
+        return True
+    
+    def in_process(self):
+        """返回进程内后端；不可用时返回 None，调用方改用 git 命令"""
+        if self.backend_name == "subprocess":
+            return None
+        if self._backend is None:
+            try:
+                self._backend = DulwichBackend(self.repo_path)
+            except Exception as e:
+                if self.backend_name == "dulwich":
+                    print(f"  ⚠ 进程内后端不可用，改用 git 命令: {e}")
+                self.backend_name = "subprocess"
+                return None
+        return self._backend
+    
+    def run_in_process(self, func, description):
+        """
+        用进程内后端执行操作，返回 (成功, 输出)；
+        后端出错时返回 None，并在本次运行中退回到 git 命令
+        """
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] {description}（进程内）...")
+        try:
+            return True, func()
+        except Exception as e:
+            print(f"  ⚠ 进程内后端出错，改用 git 命令: {e}")
+            self.backend_name = "subprocess"
+            if self._backend is not None:
+                self._backend.close()
+                self._backend = None
+            return None
+    
+    def git_status(self, description):
+        """获取 porcelain 格式的状态输出"""
+        backend = self.in_process()
+        if backend:
+            result = self.run_in_process(lambda: "\n".join(backend.status_lines()), description)
+            if result is not None:
+                return result
+        return self.run_command(["git", "status", "--porcelain"], description)
     
     def has_changes(self):
         """检查是否有文件变更"""
-        success, output = self.run_command("git status --porcelain", "检查文件状态")
+        success, output = self.git_status("检查文件状态")
         return success and output.strip()
     
     def show_changed_files(self):
         """显示变更的文件列表"""
-        success, output = self.run_command("git status -s", "查看变更文件")
+        success, output = self.git_status("查看变更文件")
         if success and output:
             print("\n📝 变更的文件:")
-            files = output.strip().split('\n')
+            files = output.strip('\n').split('\n')
             for file in files:
                 if file.startswith('??'):
                     print(f"  📄 新文件: {file[3:]}")
@@ -120,20 +910,29 @@ class GitAutoPush:
     
     def git_add(self):
         """执行git add"""
-        return self.run_command("git add .", "添加文件到暂存区")
+        backend = self.in_process()
+        if backend:
+            result = self.run_in_process(lambda: f"{backend.add_all()} 个路径", "添加文件到暂存区")
+            if result is not None:
+                return result
+        return self.run_command(["git", "add", "."], "添加文件到暂存区")
     
     def git_commit(self, message):
         """执行git commit，使用提供的提交信息"""
-        # 处理多行提交信息
-        if '\n' in message:
-            # 使用 -m 多次来处理多行信息
-            cmd_parts = ['git commit']
-            for line in message.split('\n'):
-                if line.strip():  # 忽略空行
-                    cmd_parts.append(f'-m "{line}"')
-            cmd = ' '.join(cmd_parts)
-        else:
-            cmd = f'git commit -m "{message}"'
+        backend = self.in_process()
+        if backend:
+            # 多行信息按 git commit -m 多次的效果拼接：段落之间空一行
+            paragraphs = [line for line in message.split('\n') if line.strip()]
+            result = self.run_in_process(lambda: backend.commit('\n\n'.join(paragraphs) + '\n'),
+                                         "提交更改")
+            if result is not None:
+                return result
+        
+        # 处理多行提交信息：使用 -m 多次，参数列表传递，无需处理引号
+        cmd = ['git', 'commit']
+        for line in message.split('\n'):
+            if line.strip():  # 忽略空行
+                cmd += ['-m', line]
         
         return self.run_command(cmd, "提交更改")
     
@@ -167,7 +966,8 @@ class GitAutoPush:
     
     def git_push(self):
         """执行git push"""
-        return self.run_command("git push origin main", "推送代码到远程仓库")
+        return self.run_command(["git", "push", "--progress", "origin", "main"], "推送代码到远程仓库",
+                                progress=True)
     
     def push_with_retry(self):
         """带重试的推送"""
@@ -181,7 +981,8 @@ class GitAutoPush:
             success, output = self.git_push()
             
             if success:
-                print("\n✨ 推送成功！")
+                log.info("\n✨ 推送成功！", extra=auto_log.keep_fields(attempt=retry_count + 1))
+                auto_log.flush()
                 return True
             
             # 检查是否是网络错误
@@ -189,25 +990,155 @@ class GitAutoPush:
                 retry_count += 1
                 
                 if self.max_retries is not None and retry_count >= self.max_retries:
-                    print(f"\n❌ 已达到最大重试次数 ({self.max_retries})，推送失败")
+                    log.error("\n❌ 已达到最大重试次数 (%s)，推送失败", self.max_retries)
+                    auto_log.flush()
                     return False
                 
-                print(f"\n⚠ 检测到网络错误，{self.wait_time//60}分钟后重试...")
+                log.warning("\n⚠ 检测到网络错误，%d分钟后重试...", self.wait_time // 60,
+                            extra=auto_log.fields(attempt=retry_count, error=output))
+                auto_log.flush()
                 print(f"当前时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
                 print(f"错误信息: {output[:100]}..." if len(output) > 100 else f"错误信息: {output}")
                 
-                # 倒计时
+                # 倒计时（终端上刷新同一行，日志文件中合并为一条）
                 for i in range(self.wait_time, 0, -1):
                     mins, secs = divmod(i, 60)
-                    sys.stdout.write(f"\r⏳ 等待时间: {mins:02d}:{secs:02d} (按 Ctrl+C 取消)")
-                    sys.stdout.flush()
+                    log.info("⏳ 等待时间: %02d:%02d (按 Ctrl+C 取消)", mins, secs)
                     time.sleep(1)
-                print("\n")
+                auto_log.flush()
+                print()
             else:
-                print(f"\n❌ 推送失败（非网络错误）")
+                log.error("\n❌ 推送失败（非网络错误）", extra=auto_log.fields(error=output))
+                auto_log.flush()
                 print(f"错误详情: {output}")
                 return False
     
+    def print_maintenance_result(self, task, ok, elapsed, error):
+        if ok:
+            print(f"  ✓ {task} ({elapsed:.1f}s)")
+        else:
+            print(f"  ✗ {task} 失败: {error or '未知错误'}")
+
+    def run_maintenance(self, force=False):
+        """
+        维护模式：启用 untracked cache / fsmonitor / commit-graph，执行到期的维护任务，
+        并对比前后 git status 的耗时
+        """
+        print("=" * 50)
+        print("🧹 仓库维护")
+        print("=" * 50)
+        try:
+            maintenance = RepoMaintenance(self.repo_path)
+        except RuntimeError as e:
+            print(f"❌ 错误：{e}")
+            return False
+
+        before = maintenance.time_status()
+        print(f"维护前 git status: {before * 1000:.0f} ms")
+
+        print(f"\n[{datetime.now().strftime('%H:%M:%S')}] 写入加速配置...")
+        for item, ok in maintenance.configure():
+            print(f"  {'✓' if ok else '-'} {item}")
+
+        tasks = list(RepoMaintenance.TASKS) if force else maintenance.due_tasks()
+        success = True
+        if tasks:
+            print(f"\n[{datetime.now().strftime('%H:%M:%S')}] 执行维护任务...")
+            success = maintenance.run_tasks(tasks, self.print_maintenance_result)
+        else:
+            print("\n📝 维护任务都未到期（--force 可立即执行）")
+
+        after = maintenance.time_status()
+        print(f"\n维护后 git status: {after * 1000:.0f} ms", end="")
+        if before > 0:
+            print(f"（缩短 {(before - after) / before * 100:.0f}%）" if after < before
+                  else "（无明显变化）")
+        else:
+            print()
+        return success
+
+    def due_maintenance(self):
+        """启用过维护模式的仓库返回 (RepoMaintenance, 到期任务)，否则返回 (None, [])"""
+        try:
+            maintenance = RepoMaintenance(self.repo_path)
+        except RuntimeError:
+            return None, []
+        if not maintenance.enabled:
+            return None, []
+        return maintenance, maintenance.due_tasks()
+
+    def scheduled_maintenance(self):
+        """执行到期的维护任务（在复制器或后台进程中运行），返回是否全部成功"""
+        maintenance, tasks = self.due_maintenance()
+        if not tasks:
+            return True
+        print(f"\n[{datetime.now().strftime('%H:%M:%S')}] 执行到期的维护任务: {self.repo_path}")
+        return maintenance.run_tasks(tasks, self.print_maintenance_result)
+
+    def spawn_maintenance(self):
+        """推送成功后，有到期的维护任务时以后台进程执行，不阻塞本次运行"""
+        _, tasks = self.due_maintenance()
+        if not tasks:
+            return
+        cmd = [sys.executable, os.path.abspath(__file__), "--maintenance", "--scheduled",
+               "-p", os.path.abspath(self.repo_path)]
+        log_path = _spawn_detached(cmd, os.path.join(STATE_DIR, "maintenance.log"))
+        print(f"🧹 后台执行到期的维护任务 ({', '.join(tasks)})，日志: {log_path}")
+
+    def default_mirror_path(self):
+        """默认镜像位置：状态目录下按仓库名+路径哈希区分"""
+        repo = os.path.abspath(self.repo_path)
+        digest = hashlib.sha1(repo.encode('utf-8')).hexdigest()[:8]
+        name = os.path.basename(repo.rstrip(os.sep)) or "repo"
+        return os.path.join(STATE_DIR, "mirrors", f"{name}-{digest}.git")
+
+    def ensure_mirror(self):
+        """确保本地裸镜像存在，返回其绝对路径"""
+        mirror = os.path.abspath(self.mirror_path or self.default_mirror_path())
+        if not os.path.exists(os.path.join(mirror, "HEAD")):
+            os.makedirs(mirror, exist_ok=True)
+            success, _ = self.run_command(["git", "init", "--bare", mirror], "创建本地裸镜像")
+            if not success:
+                return None
+        return mirror
+
+    def get_origin_url(self):
+        """读取 origin 的地址；本地路径转换为绝对路径，供镜像内推送使用"""
+        success, output = self.run_command(["git", "remote", "get-url", "origin"], "读取远程地址")
+        if not success:
+            return None
+        url = output.strip()
+        candidate = os.path.join(self.repo_path, url)
+        if "://" not in url and os.path.exists(candidate):
+            url = os.path.abspath(candidate)
+        return url
+
+    def push_to_mirror(self):
+        """推送到本地镜像并登记到出站队列，由后台复制器负责推送到 origin"""
+        mirror = self.ensure_mirror()
+        if not mirror:
+            print("❌ 无法创建本地镜像")
+            return False
+        remote = self.get_origin_url()
+        if not remote:
+            print("❌ 无法获取 origin 地址")
+            return False
+        # 镜像只是本仓库分支的暂存，强制推送保证与本地一致；推送到 origin 时不强制
+        success, _ = self.run_command(["git", "push", "--force", mirror, "main:main"], "推送到本地镜像")
+        if not success:
+            return False
+        success, sha = self.run_command(["git", "rev-parse", "main"], "读取提交号")
+        if not success:
+            return False
+
+        queue = OutboundQueue(self.queue_file)
+        entry = queue.enqueue(os.path.abspath(self.repo_path), mirror, remote,
+                              "refs/heads/main", sha.strip())
+        log_path = Replicator.spawn(queue.path, self.wait_time, self.max_retries)
+        print(f"\n✨ 已写入本地镜像，后台复制器将推送到远程 (条目 {entry['id']})")
+        print(f"复制器日志: {log_path}")
+        return True
+
     def run(self):
         """运行完整的流程"""
         print("=" * 50)
@@ -229,6 +1160,9 @@ class GitAutoPush:
             print("❌ 错误：指定路径不是Git仓库！")
             return False
         
+        # 已配置大文件存储时，status/add/commit 从一开始就使用 git 命令
+        offload_location = self.offload_location()
+        
         # 检查是否有变更
         if not self.has_changes():
             print("📝 没有文件需要提交，操作完成")
@@ -240,6 +1174,11 @@ class GitAutoPush:
         # 获取用户输入的commit message
         commit_message = self.get_commit_message_from_user()
         
+        # 提交信息确认后才上传大文件并以指针暂存，在提示处中止不会在索引中留下指针
+        if offload_location and not self.offload_large_files(offload_location):
+            print("❌ 大文件外置失败，终止操作")
+            return False
+        
         # 执行git add
         add_success, _ = self.git_add()
         if not add_success:
@@ -252,8 +1191,17 @@ class GitAutoPush:
             print("❌ git commit失败，终止操作")
             return False
         
+        # 写后镜像模式：推送到本地镜像后立即返回，到期的维护任务由复制器在推送到远程后执行
+        if self.mirror_path is not None:
+            return self.push_to_mirror()
+        
         # 执行git push（带重试）
-        return self.push_with_retry()
+        success = self.push_with_retry()
+        
+        # 启用过维护模式时，推送成功后在后台执行到期的维护任务
+        if success:
+            self.spawn_maintenance()
+        return success
 
 def main():
     parser = argparse.ArgumentParser(description='Git自动提交推送工具')
@@ -262,6 +1210,26 @@ def main():
     parser.add_argument('-r', '--retries', type=int, help='最大重试次数', default=None)
     parser.add_argument('-w', '--wait', type=int, help='重试等待时间（秒）', default=300)
     parser.add_argument('-y', '--yes', action='store_true', help='使用自动生成的信息，不提示输入')
+    parser.add_argument('--mirror', nargs='?', const='', default=None, metavar='PATH',
+                        help='写后镜像模式：推送到本地裸镜像后立即返回（可指定镜像路径）')
+    parser.add_argument('--timeout', type=int, help='单条命令超时（秒）', default=None)
+    parser.add_argument('--stall-timeout', type=int, help='推送连续无进度输出多少秒视为卡住（默认60，0表示不限）',
+                        default=60)
+    parser.add_argument('--backend', choices=['subprocess', 'dulwich', 'auto'], default='subprocess',
+                        help='status/add/commit 的执行方式（dulwich 为进程内，需要 pip install dulwich）')
+    parser.add_argument('--offload-store', default=None,
+                        help='大文件存储：本地目录或 http(s) 地址（默认读取 git config offload.store）')
+    parser.add_argument('--offload-threshold', type=float, default=1,
+                        help='超过多少MB的文件以指针提交（默认1）')
+    parser.add_argument('--queue-file', default=None, help='出站队列文件（默认 ~/.auto-push/queue.json）')
+    parser.add_argument('--replicate', action='store_true', help='运行复制器，把队列推送到远程后退出')
+    parser.add_argument('--queue', action='store_true', help='查看出站队列')
+    parser.add_argument('--retry-failed', action='store_true', help='把失败的队列条目重新标记为待推送')
+    parser.add_argument('--maintenance', action='store_true',
+                        help='维护模式：启用 untracked cache/fsmonitor/commit-graph，执行到期的重新打包等任务')
+    parser.add_argument('--force', action='store_true', help='与 --maintenance 一起使用：立即执行所有维护任务')
+    parser.add_argument('--scheduled', action='store_true',
+                        help='与 --maintenance 一起使用：只执行到期的任务（推送成功后由后台进程调用）')
     
     args = parser.parse_args()
     
@@ -269,6 +1237,42 @@ def main():
     if not args.path:
         args.path = os.getcwd()
     
+    # 复制器与前台的 auto-push 同时运行，不同仓库的 auto-push 也可能同时运行，
+    # 各自使用单独的日志文件，避免多个进程轮转同一文件
+    if args.replicate:
+        auto_log.setup("auto-push", os.path.join(auto_log.LOG_DIR, "auto-push-replicator.jsonl"))
+    else:
+        auto_log.setup("auto-push", auto_log.log_file_for("auto-push", args.path))
+    
+    if args.queue or args.retry_failed:
+        queue = OutboundQueue(args.queue_file)
+        if args.retry_failed:
+            print(f"已重新排队 {queue.retry_failed()} 个失败条目")
+            Replicator.spawn(queue.path, args.wait, args.retries)
+        entries = queue.entries()
+        print(f"出站队列: {queue.path} ({len(entries)} 个条目)")
+        for entry in entries:
+            print(f"  [{entry['status']}] {entry['repo']} {entry['sha'][:8]} -> {entry['remote']}"
+                  f" (尝试 {entry['attempts']} 次)")
+            if entry.get('last_error'):
+                print(f"      错误: {entry['last_error'][:100]}")
+        sys.exit(0)
+    
+    if args.replicate:
+        replicator = Replicator(OutboundQueue(args.queue_file), wait_time=args.wait,
+                                max_retries=args.retries, stall_timeout=args.stall_timeout or None)
+        try:
+            sys.exit(0 if replicator.run() else 1)
+        except KeyboardInterrupt:
+            print("\n\n👋 复制器被中断，队列已保存，下次启动继续")
+            sys.exit(1)
+    
+    if args.maintenance:
+        tool = GitAutoPush(repo_path=args.path, detached=args.scheduled)
+        if args.scheduled:
+            sys.exit(0 if tool.scheduled_maintenance() else 1)
+        sys.exit(0 if tool.run_maintenance(force=args.force) else 1)
+    
     # 如果指定了-y参数，使用自动生成的信息
     if args.yes and not args.message:
         args.message = f"自动提交: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
@@ -277,7 +1281,14 @@ def main():
         repo_path=args.path,
         commit_message=args.message,
         max_retries=args.retries,
-        wait_time=args.wait
+        wait_time=args.wait,
+        mirror_path=args.mirror,
+        queue_file=args.queue_file,
+        command_timeout=args.timeout,
+        stall_timeout=args.stall_timeout or None,
+        backend=args.backend,
+        offload_store=args.offload_store,
+        offload_threshold=int(args.offload_threshold * 1024 * 1024)
     )
     
     try:
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import sys
+import asyncio
+import argparse
+import mimetypes
+from datetime import datetime
+from email.utils import formatdate
+from urllib.parse import quote, unquote, urlsplit
+
+import asset_cache
+
+mimetypes.add_type("audio/ogg", ".ogg")
+mimetypes.add_type("audio/ogg", ".opus")
+mimetypes.add_type("audio/mpeg", ".mp3")
+mimetypes.add_type("image/webp", ".webp")
+mimetypes.add_type("application/json", ".json")
+
+# 预压缩副本，按优先级排列
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+# auto-build.py 生成的带内容哈希文件名，可以长期缓存
+HASHED_NAME = re.compile(r"\.[0-9a-f]{8,}\.[A-Za-z0-9]+$")
+
+REASONS = {
+    200: "OK", 206: "Partial Content", 301: "Moved Permanently", 304: "Not Modified",
+    400: "Bad Request", 403: "Forbidden", 404: "Not Found", 405: "Method Not Allowed",
+    416: "Range Not Satisfiable", 500: "Internal Server Error",
+}
+
+
+class StatHashIndex:
+    """
+    强 ETag 索引：按 (mtime, size, inode) 缓存文件内容哈希
+    文件未改动时不再重新读取计算
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, path, stat):
+        """命中缓存时返回 ETag，否则返回 None"""
+        cached = self.entries.get(path)
+        if cached and cached[0] == (stat.st_mtime_ns, stat.st_size, stat.st_ino):
+            self.hits += 1
+            return cached[1]
+        return None
+
+    def etag(self, path, stat):
+        """读取文件计算哈希并写入缓存"""
+        key = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        self.misses += 1
+        digest, _ = asset_cache.hash_file(path)
+        value = f'"{digest[:32]}"'
+        self.entries[path] = (key, value)
+        return value
+
+
+def parse_range(header, size):
+    """
+    解析单段 Range 头，返回 (起始, 结束)；
+    不支持的格式返回 None（按完整内容响应），无法满足返回 False
+    """
+    match = re.fullmatch(r"\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*", header)
+    if not match:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        length = int(end)
+        if length == 0:
+            return False
+        return max(0, size - length), size - 1
+    start = int(start)
+    end = int(end) if end else size - 1
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+class PreviewServer:
+    def __init__(self, root=None, host="127.0.0.1", port=8000, quiet=False):
+        """
+        初始化本地预览服务器
+
+        Args:
+            root: 站点根目录，None表示脚本所在目录
+            host: 监听地址
+            port: 监听端口
+            quiet: 不打印访问日志
+        """
+        self.root = os.path.realpath(root or os.path.dirname(os.path.abspath(__file__)))
+        self.host = host
+        self.port = port
+        self.quiet = quiet
+        self.index = StatHashIndex()
+        self.requests = 0
+        self.bytes_sent = 0
+
+    def log(self, method, target, status, length):
+        if not self.quiet:
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] {method} {target} {status} {length}")
+
+    def resolve(self, target):
+        """把请求路径映射到文件，返回 (文件路径, 重定向地址)"""
+        path = unquote(urlsplit(target).path)
+        full_path = os.path.realpath(os.path.join(self.root, path.lstrip('/')))
+        if full_path != self.root and not full_path.startswith(self.root + os.sep):
+            return None, None
+        if os.path.isdir(full_path):
+            if not path.endswith('/'):
+                # 重新编码：解码后的路径可能含有 CR/LF（注入响应头）或非 latin-1 字符；
+                # 开头只保留一个斜杠，避免 //host 形式被当作其他站点
+                return None, quote('/' + path.lstrip('/')) + '/'
+            full_path = os.path.join(full_path, "index.html")
+        return (full_path if os.path.isfile(full_path) else None), None
+
+    def choose_representation(self, path, headers):
+        """有 .br/.gz 副本且客户端接受时返回 (副本路径, 编码)"""
+        accepted = {token.split(';')[0].strip().lower()
+                    for token in headers.get("accept-encoding", "").split(',')}
+        for encoding, suffix in ENCODINGS:
+            if encoding in accepted and os.path.isfile(path + suffix):
+                return path + suffix, encoding
+        return path, None
+
+    async def send_simple(self, writer, status, extra=None, body=b"", head=False):
+        headers = {"Content-Length": str(len(body)), "Content-Type": "text/plain; charset=utf-8"}
+        headers.update(extra or {})
+        await self.send_headers(writer, status, headers)
+        if body and not head:
+            writer.write(body)
+            await writer.drain()
+
+    async def send_headers(self, writer, status, headers):
+        lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+                 f"Date: {formatdate(usegmt=True)}", "Server: auto-serve"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1'))
+        await writer.drain()
+
+    async def serve_file(self, writer, method, path, headers):
+        """发送文件：处理协商压缩、ETag/304 和字节范围"""
+        has_siblings = any(os.path.isfile(path + suffix) for _, suffix in ENCODINGS)
+        range_header = headers.get("range")
+        # 范围请求只针对原始内容，避免压缩副本的偏移含义混乱
+        if range_header:
+            file_path, encoding = path, None
+        else:
+            file_path, encoding = self.choose_representation(path, headers)
+
+        stat = os.stat(file_path)
+        size = stat.st_size
+        etag = self.index.lookup(file_path, stat)
+        if etag is None:
+            # 首次计算哈希放到线程里，避免大文件阻塞事件循环
+            etag = await asyncio.to_thread(self.index.etag, file_path, stat)
+        if encoding:
+            etag = etag[:-1] + f'-{encoding}"'
+
+        response_headers = {
+            "Content-Type": mimetypes.guess_type(path)[0] or "application/octet-stream",
+            "ETag": etag,
+            "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+            "Accept-Ranges": "bytes",
+            "Cache-Control": ("public, max-age=31536000, immutable"
+                              if HASHED_NAME.search(path) else "no-cache"),
+        }
+        if encoding:
+            response_headers["Content-Encoding"] = encoding
+        if has_siblings:
+            response_headers["Vary"] = "Accept-Encoding"
+
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*"
+                              or etag in [t.strip() for t in if_none_match.split(',')]):
+            del response_headers["Content-Type"]
+            await self.send_headers(writer, 304, response_headers)
+            return 304, 0
+
+        status, offset, count = 200, 0, size
+        if range_header:
+            if_range = headers.get("if-range")
+            byte_range = parse_range(range_header, size) if not if_range or if_range == etag else None
+            if byte_range is False:
+                await self.send_simple(writer, 416, {"Content-Range": f"bytes */{size}"})
+                return 416, 0
+            if byte_range:
+                offset, end = byte_range
+                count = end - offset + 1
+                status = 206
+                response_headers["Content-Range"] = f"bytes {offset}-{end}/{size}"
+
+        response_headers["Content-Length"] = str(count)
+        await self.send_headers(writer, status, response_headers)
+        if method == "HEAD" or count == 0:
+            return status, 0
+
+        loop = asyncio.get_running_loop()
+        with open(file_path, 'rb') as f:
+            # 支持时走零拷贝 sendfile，否则 asyncio 自动退回到读写循环
+            await loop.sendfile(writer.transport, f, offset, count)
+        self.bytes_sent += count
+        return status, count
+
+    async def read_headers(self, reader):
+        """读取请求头，连接关闭时返回 None"""
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        return request_line.decode('latin-1').strip(), headers
+
+    async def handle(self, reader, writer):
+        """处理一个连接上的所有请求（HTTP/1.1 长连接）"""
+        try:
+            while True:
+                request = await self.read_headers(reader)
+                if request is None:
+                    break
+                request_line, headers = request
+                parts = request_line.split()
+                if len(parts) != 3:
+                    await self.send_simple(writer, 400, {"Connection": "close"}, b"Bad Request")
+                    break
+                method, target, version = parts
+                self.requests += 1
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              and version != "HTTP/1.0")
+
+                if method not in ("GET", "HEAD"):
+                    status, length = 405, 0
+                    await self.send_simple(writer, 405, {"Allow": "GET, HEAD"})
+                else:
+                    path, redirect = self.resolve(target)
+                    if redirect:
+                        status, length = 301, 0
+                        await self.send_simple(writer, 301, {"Location": redirect})
+                    elif path is None:
+                        status, length = 404, 0
+                        await self.send_simple(writer, 404, body=b"Not Found", head=method == "HEAD")
+                    else:
+                        status, length = await self.serve_file(writer, method, path, headers)
+                self.log(method, target, status, length)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            print(f"  ✗ 处理请求出错: {e}")
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    async def serve(self):
+        server = await asyncio.start_server(self.handle, self.host, self.port)
+        print("=" * 50)
+        print("🌐 本地预览服务器")
+        print("=" * 50)
+        print(f"站点目录: {self.root}")
+        print(f"访问地址: http://{self.host}:{self.port}/")
+        print("按 Ctrl+C 退出")
+        print("=" * 50)
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地静态预览服务器（Range、预压缩、ETag/304、sendfile）')
+    parser.add_argument('-d', '--dir', help='站点目录（默认脚本所在目录，可指定 dist）', default=None)
+    parser.add_argument('-p', '--port', type=int, help='监听端口', default=8000)
+    parser.add_argument('--host', help='监听地址', default="127.0.0.1")
+    parser.add_argument('-q', '--quiet', action='store_true', help='不打印访问日志')
+
+    args = parser.parse_args()
+
+    server = PreviewServer(root=args.dir, host=args.host, port=args.port, quiet=args.quiet)
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        print(f"\n\n👋 服务器已停止，共处理 {server.requests} 个请求，"
+              f"发送 {server.bytes_sent / 1024 / 1024:.1f} MB，"
+              f"ETag 缓存命中 {server.index.hits}/{server.index.hits + server.index.misses}")
+        sys.exit(0)
+    except OSError as e:
+        print(f"❌ 启动失败: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
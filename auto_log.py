@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+auto-click.py / auto-push.py / auto-pull.py 共用的日志
+
+- 调用方只把记录放进队列（QueueHandler），格式化和写出都在后台线程完成
+- 日志文件为 JSON lines，按大小轮转；连续重复的消息合并为一条并记录次数
+- 终端（TTY）上普通消息只刷新一行状态，并限制刷新频率；
+  警告、错误以及带 extra=KEEP 的消息另起一行保留，extra=file_only(...) 的消息只写文件
+- 脚本在模块级只取 logging.getLogger(名称)，由 main() 调用 setup()；
+  被其他脚本导入（例如 auto-bench.py）时不会启动后台线程或创建日志目录
+"""
+
+import os
+import sys
+import json
+import hashlib
+import time
+import queue
+import atexit
+import logging
+import logging.handlers
+from datetime import datetime
+
+LOG_DIR = os.path.join(os.path.expanduser("~"), ".auto-logs")
+
+# logger.info("...", extra=KEEP)：在终端上保留为完整的一行
+KEEP = {"persist": True}
+
+
+def fields(**values):
+    """logger.info("...", extra=fields(x=1))：附加到 JSON 日志的结构化字段"""
+    return {"fields": values}
+
+
+def keep_fields(**values):
+    return {"persist": True, "fields": values}
+
+
+def file_only(**values):
+    """只写入 JSON 日志、不在终端显示的结构化事件（终端已有 print 输出时使用），不参与合并"""
+    return {"console": False, "collapse": False, "fields": values}
+
+
+class JsonLineFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        repeat = getattr(record, "repeat", 1)
+        if repeat > 1:
+            entry["repeat"] = repeat
+            entry["first_ts"] = datetime.fromtimestamp(record.first_created).isoformat(
+                timespec='milliseconds')
+        if getattr(record, "fields", None):
+            entry.update(record.fields)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def _labels(values):
+    """合并用的标识：数值（计数、比例等）不同仍视为重复，文字不同则是不同的消息"""
+    return tuple(str(v) for v in values if not isinstance(v, (int, float)))
+
+
+class TemplateQueueHandler(logging.handlers.QueueHandler):
+    """入队前会把参数合并进 msg，这里先保存消息模板和非数值参数，供合并重复记录使用"""
+
+    def prepare(self, record):
+        template = str(record.msg)
+        args = record.args
+        if isinstance(args, dict):
+            args = args.values()
+        labels = _labels(args or ())
+        record = super().prepare(record)
+        record.template = template
+        record.template_args = labels
+        return record
+
+
+class CollapsingHandler(logging.Handler):
+    """
+    合并连续重复的记录（同级别、同消息模板、同非数值参数和字段）后交给目标处理器
+
+    第一条立即写出，之后只计数；模板变化、超过 flush_interval 或关闭时，
+    写出最后一条并带上 repeat 次数
+    """
+
+    def __init__(self, target, flush_interval=60):
+        super().__init__()
+        self.target = target
+        self.flush_interval = flush_interval
+        self.enabled = True
+        self.key = None
+        self.pending = None
+        self.count = 0
+        self.first_created = 0
+
+    def _flush_pending(self):
+        if self.pending is not None and self.count > 0:
+            self.pending.repeat = self.count + 1
+            self.pending.first_created = self.first_created
+            self.target.handle(self.pending)
+        self.pending = None
+        self.count = 0
+
+    def emit(self, record):
+        if not self.enabled:
+            return
+        if not getattr(record, "collapse", True):
+            self._flush_pending()
+            self.key = None
+            self.target.handle(record)
+            return
+        values = getattr(record, "fields", None) or {}
+        labels = tuple(sorted((k, str(v)) for k, v in values.items()
+                              if not isinstance(v, (int, float))))
+        key = (record.levelno, record.name, getattr(record, "template", str(record.msg)),
+               getattr(record, "template_args", ()), labels)
+        if key == self.key and record.created - self.first_created < self.flush_interval:
+            self.pending = record
+            self.count += 1
+            return
+        self._flush_pending()
+        self.key = key
+        self.first_created = record.created
+        self.target.handle(record)
+
+    def flush(self):
+        self._flush_pending()
+        self.key = None
+        self.target.flush()
+
+    def close(self):
+        self.flush()
+        self.target.close()
+        super().close()
+
+
+class StatusLineHandler(logging.Handler):
+    """
+    终端输出：TTY 上普通消息覆盖同一行，刷新间隔不小于 min_interval；
+    非 TTY（重定向到文件、复制器日志）时每条消息逐行输出，不做限频
+    """
+
+    def __init__(self, stream=None, min_interval=0.5):
+        super().__init__()
+        # 未指定时每次写出都取当前的 sys.stdout，redirect_stdout 等重定向才能生效
+        self._stream = stream
+        self.min_interval = min_interval
+        self.enabled = True
+        self.last_write = 0
+        self.width = 0
+        # 因限频没有显示的最新状态，结束状态行时补上
+        self.pending = None
+
+    @property
+    def stream(self):
+        return self._stream or sys.stdout
+
+    @property
+    def live(self):
+        stream = self.stream
+        return hasattr(stream, "isatty") and stream.isatty()
+
+    def write_status(self, text):
+        stream = self.stream
+        # 截断到终端宽度，避免折行后 \r 无法覆盖
+        columns = max(20, _terminal_columns() - 1)
+        text = text.splitlines()[0][:columns] if text else ""
+        stream.write("\r" + text.ljust(self.width))
+        self.width = len(text)
+        self.pending = None
+
+    def end_line(self):
+        """结束当前状态行，之后的 print() 从新行开始"""
+        if self.pending is not None:
+            self.write_status(self.pending)
+        if self.width:
+            self.stream.write("\n")
+            self.stream.flush()
+            self.width = 0
+
+    def emit(self, record):
+        if not self.enabled or not getattr(record, "console", True):
+            return
+        try:
+            text = self.format(record)
+            stream = self.stream
+            if not self.live:
+                stream.write(text + "\n")
+                stream.flush()
+                return
+            persist = getattr(record, "persist", False) or record.levelno >= logging.WARNING
+            now = time.monotonic()
+            if not persist and now - self.last_write < self.min_interval:
+                self.pending = text
+                return
+            self.last_write = now
+            if persist:
+                if self.width:
+                    stream.write("\r" + " " * self.width + "\r")
+                    self.width = 0
+                stream.write(text + "\n")
+                self.pending = None
+            else:
+                self.write_status(text)
+            stream.flush()
+        except Exception:
+            self.handleError(record)
+
+
+def _terminal_columns():
+    try:
+        return os.get_terminal_size().columns
+    except OSError:
+        return 80
+
+
+class _Setup:
+    def __init__(self, logger, listener, log_queue, status, file):
+        self.logger = logger
+        self.listener = listener
+        self.queue = log_queue
+        self.status = status
+        self.file = file
+        self.log_path = file.target.baseFilename
+
+
+_setups = {}
+
+
+def log_file_for(name, key):
+    """
+    按 key（仓库路径等）区分的日志文件 ~/.auto-logs/<name>-<目录名>-<哈希>.jsonl，
+    同时运行的多个进程（例如不同仓库的 auto-push）不会写入和轮转同一个文件
+    """
+    key = os.path.abspath(key)
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:8]
+    label = os.path.basename(key.rstrip(os.sep)) or "root"
+    return os.path.join(LOG_DIR, f"{name}-{label}-{digest}.jsonl")
+
+
+def setup(name, log_file=None, level=logging.INFO, console=True, file=True,
+          max_bytes=5 * 1024 * 1024, backup_count=3):
+    """
+    创建（或取回已创建的）日志器
+
+    Args:
+        name: 日志器名称，默认日志文件为 ~/.auto-logs/<name>.jsonl
+        log_file: 日志文件路径
+        level: 记录级别
+        console: 是否输出到终端
+        file: 是否写日志文件（文件在第一条记录写出时才打开）
+        max_bytes / backup_count: 文件轮转大小和保留份数
+    """
+    if name in _setups:
+        return _setups[name].logger
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file or os.path.join(LOG_DIR, f"{name}.jsonl"), maxBytes=max_bytes,
+        backupCount=backup_count, encoding='utf-8', delay=True)
+    file_handler.setFormatter(JsonLineFormatter())
+    collapsing = CollapsingHandler(file_handler)
+    collapsing.enabled = file
+    if collapsing.enabled:
+        _make_log_dir(file_handler.baseFilename)
+
+    status = StatusLineHandler()
+    status.setFormatter(logging.Formatter("%(message)s"))
+    status.enabled = console
+
+    log_queue = queue.Queue()
+    listener = logging.handlers.QueueListener(log_queue, collapsing, status,
+                                              respect_handler_level=True)
+    listener.start()
+
+    logger = logging.getLogger(name)
+    logger.setLevel(level)
+    logger.propagate = False
+    logger.addHandler(TemplateQueueHandler(log_queue))
+
+    _setups[name] = _Setup(logger, listener, log_queue, status, collapsing)
+    return logger
+
+
+def _make_log_dir(path):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    except OSError as e:
+        print(f"⚠ 无法创建日志目录 {os.path.dirname(path)}: {e}")
+
+
+def log_path(name):
+    entry = _setups.get(name)
+    return entry.log_path if entry else None
+
+
+def flush(name=None):
+    """
+    等待队列中的记录全部写出并结束终端状态行；
+    在交互式 print()/input() 之前调用，保证输出顺序
+    """
+    for key, entry in list(_setups.items()):
+        if name is not None and key != name:
+            continue
+        entry.queue.join()
+        entry.status.end_line()
+
+
+def shutdown():
+    """停止后台线程，写出合并中的重复记录"""
+    for entry in list(_setups.values()):
+        entry.listener.stop()
+        entry.status.end_line()
+        for handler in entry.listener.handlers:
+            handler.close()
+    _setups.clear()
+
+
+atexit.register(shutdown)
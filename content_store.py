@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+大文件内容寻址存储（auto-push.py / auto-pull.py 共用）
+
+超过阈值的文件在提交时替换为很小的指针文件，真实内容按 sha256 存放到
+本地目录或 HTTP 服务器；拉取后再按指针把内容取回工作区。
+已取回的文件设置 skip-worktree，git status 不会把真实内容当作修改。
+"""
+
+import os
+import json
+import shutil
+import subprocess
+import urllib.request
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+
+from asset_cache import hash_file
+
+POINTER_HEADER = "amitofo-offload v1"
+POINTER_MAX_SIZE = 200
+
+# 仓库内记录已外置文件状态的位置（在 .git 目录下，不会被提交）
+STATE_FILE = "offload-state.json"
+CACHE_DIR = os.path.join("offload", "objects")
+
+
+def make_pointer(oid, size):
+    return f"{POINTER_HEADER}\noid sha256:{oid}\nsize {size}\n".encode('utf-8')
+
+
+def parse_pointer(data):
+    """解析指针文件内容，返回 (oid, size)，不是指针时返回 None"""
+    if len(data) > POINTER_MAX_SIZE:
+        return None
+    try:
+        lines = data.decode('utf-8').splitlines()
+    except UnicodeDecodeError:
+        return None
+    if len(lines) != 3 or lines[0] != POINTER_HEADER:
+        return None
+    if not lines[1].startswith("oid sha256:") or not lines[2].startswith("size "):
+        return None
+    try:
+        return lines[1][len("oid sha256:"):], int(lines[2][len("size "):])
+    except ValueError:
+        return None
+
+
+class LocalStore:
+    """本地目录存储：objects/ab/cd/<oid>"""
+
+    def __init__(self, root):
+        self.root = os.path.abspath(os.path.expanduser(root))
+
+    def __str__(self):
+        return self.root
+
+    def path_for(self, oid):
+        return os.path.join(self.root, oid[:2], oid[2:4], oid)
+
+    def has(self, oid):
+        return os.path.isfile(self.path_for(oid))
+
+    def put(self, oid, source):
+        target = self.path_for(oid)
+        if os.path.isfile(target):
+            return
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, target)
+
+    def get(self, oid, target):
+        shutil.copyfile(self.path_for(oid), target)
+
+
+class HttpStore:
+    """HTTP 存储：GET/HEAD/PUT <url>/<oid>，可用任意支持 PUT 的静态服务器"""
+
+    def __init__(self, url, timeout=60):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def __str__(self):
+        return self.url
+
+    def object_url(self, oid):
+        return f"{self.url}/{oid[:2]}/{oid[2:4]}/{oid}"
+
+    def has(self, oid):
+        request = urllib.request.Request(self.object_url(oid), method="HEAD")
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout):
+                return True
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return False
+            raise
+
+    def put(self, oid, source):
+        if self.has(oid):
+            return
+        size = os.path.getsize(source)
+        with open(source, 'rb') as f:
+            request = urllib.request.Request(self.object_url(oid), data=f, method="PUT",
+                                             headers={"Content-Length": str(size),
+                                                      "Content-Type": "application/octet-stream"})
+            with urllib.request.urlopen(request, timeout=self.timeout):
+                pass
+
+    def get(self, oid, target):
+        with urllib.request.urlopen(self.object_url(oid), timeout=self.timeout) as response:
+            with open(target, 'wb') as f:
+                shutil.copyfileobj(response, f, 1024 * 1024)
+
+
+def open_store(location):
+    """根据地址选择存储类型"""
+    if location.startswith(("http://", "https://")):
+        return HttpStore(location)
+    return LocalStore(location)
+
+
+def _git(repo_path, args, input_data=None):
+    result = subprocess.run(["git"] + args, cwd=repo_path, input=input_data,
+                            capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode('utf-8', errors='replace').strip()
+                           or f"git {args[0]} 失败")
+    return result.stdout
+
+
+def configured_store(repo_path, override=None):
+    """命令行参数优先，否则读取 git config offload.store"""
+    if override:
+        return override
+    result = subprocess.run(["git", "config", "--get", "offload.store"], cwd=repo_path,
+                            capture_output=True, text=True)
+    return result.stdout.strip() or None
+
+
+class OffloadRepo:
+    def __init__(self, repo_path, store, jobs=8):
+        """
+        Args:
+            repo_path: 工作仓库路径
+            store: LocalStore / HttpStore
+            jobs: 并行上传/下载的线程数
+        """
+        self.repo_path = os.path.abspath(repo_path)
+        self.store = store
+        self.jobs = jobs
+        git_dir = _git(self.repo_path, ["rev-parse", "--absolute-git-dir"]).decode().strip()
+        self.state_path = os.path.join(git_dir, STATE_FILE)
+        self.cache = LocalStore(os.path.join(git_dir, CACHE_DIR))
+        self.state = self.load_state()
+
+    def load_state(self):
+        if not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_state(self):
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def full_path(self, path):
+        return os.path.join(self.repo_path, path)
+
+    def record(self, path, oid):
+        stat = os.stat(self.full_path(path))
+        self.state[path] = {"oid": oid, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def unchanged(self, path):
+        """按 stat 判断已外置的文件是否没有改动"""
+        entry = self.state.get(path)
+        try:
+            stat = os.stat(self.full_path(path))
+        except OSError:
+            return False
+        return bool(entry) and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns
+
+    def changed_paths(self):
+        """git status 中新增/修改的文件，加上被 skip-worktree 隐藏、但已改动的外置文件"""
+        output = _git(self.repo_path, ["status", "--porcelain", "-z", "--no-renames",
+                                       "--untracked-files=all"])
+        paths = []
+        for item in output.decode('utf-8', errors='replace').split('\0'):
+            if len(item) > 3 and item[1] != 'D' and item[0] != 'D':
+                paths.append(item[3:])
+        for path in self.state:
+            if path not in paths and os.path.exists(self.full_path(path)) and not self.unchanged(path):
+                paths.append(path)
+        return paths
+
+    def stage_pointer(self, path, oid, size):
+        """把指针写入对象库和暂存区，工作区保留真实内容"""
+        blob = _git(self.repo_path, ["hash-object", "-w", "--stdin"],
+                    input_data=make_pointer(oid, size)).decode().strip()
+        mode = "100755" if os.access(self.full_path(path), os.X_OK) and os.name != 'nt' else "100644"
+        _git(self.repo_path, ["update-index", "--add", "--cacheinfo", f"{mode},{blob},{path}"])
+        _git(self.repo_path, ["update-index", "--skip-worktree", "--", path])
+
+    def offload(self, threshold):
+        """
+        把超过阈值的新增/修改文件上传到存储并以指针暂存
+        返回 [(路径, 大小)]
+        """
+        candidates = []
+        for path in self.changed_paths():
+            full_path = self.full_path(path)
+            if os.path.isfile(full_path) and not os.path.islink(full_path) \
+                    and os.path.getsize(full_path) >= threshold:
+                candidates.append(path)
+
+        def upload(path):
+            oid, size = hash_file(self.full_path(path))
+            self.store.put(oid, self.full_path(path))
+            self.cache.put(oid, self.full_path(path))
+            return path, oid, size
+
+        offloaded = []
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            for path, oid, size in executor.map(upload, candidates):
+                self.stage_pointer(path, oid, size)
+                self.record(path, oid)
+                offloaded.append((path, size))
+
+        # 已外置的文件被删除时，skip-worktree 会隐藏删除，这里显式从暂存区移除
+        for path in list(self.state):
+            if not os.path.exists(self.full_path(path)):
+                _git(self.repo_path, ["update-index", "--no-skip-worktree", "--", path])
+                _git(self.repo_path, ["rm", "--cached", "--quiet", "--ignore-unmatch", "--", path])
+                del self.state[path]
+        self.save_state()
+        return offloaded
+
+    def release(self, upstream):
+        """
+        合并前把上游会改动的外置文件恢复为指针，否则 skip-worktree 下的真实内容
+        会被 git 当作本地修改而拒绝合并；本地改过的文件保持不动
+        返回恢复的路径列表
+        """
+        output = _git(self.repo_path, ["diff", "--name-only", "-z", "HEAD", upstream])
+        released = []
+        for path in output.decode('utf-8', errors='replace').split('\0'):
+            if path in self.state and self.unchanged(path):
+                _git(self.repo_path, ["update-index", "--no-skip-worktree", "--", path])
+                _git(self.repo_path, ["checkout", "--", path])
+                del self.state[path]
+                released.append(path)
+        if released:
+            self.save_state()
+        return released
+
+    def pointer_entries(self):
+        """扫描暂存区中内容是指针的文件，返回 {路径: (oid, size)}"""
+        listing = _git(self.repo_path, ["ls-files", "-s", "-z"]).decode('utf-8', errors='replace')
+        blobs = {}
+        for item in listing.split('\0'):
+            if not item:
+                continue
+            meta, path = item.split('\t', 1)
+            mode, blob, _ = meta.split()
+            if mode.startswith("100"):
+                blobs[path] = blob
+        if not blobs:
+            return {}
+
+        # 先批量查询大小，只读取足够小的对象
+        check = _git(self.repo_path, ["cat-file", "--batch-check"],
+                     input_data="\n".join(blobs.values()).encode() + b"\n").decode()
+        small = set()
+        for line in check.splitlines():
+            parts = line.split()
+            if len(parts) == 3 and int(parts[2]) <= POINTER_MAX_SIZE:
+                small.add(parts[0])
+        if not small:
+            return {}
+        batch = _git(self.repo_path, ["cat-file", "--batch"],
+                     input_data="\n".join(small).encode() + b"\n")
+        contents = {}
+        offset = 0
+        while offset < len(batch):
+            header_end = batch.index(b"\n", offset)
+            sha, _, size = batch[offset:header_end].decode().split()
+            start = header_end + 1
+            contents[sha] = batch[start:start + int(size)]
+            offset = start + int(size) + 1
+
+        pointers = {}
+        for path, blob in blobs.items():
+            if blob in contents:
+                pointer = parse_pointer(contents[blob])
+                if pointer:
+                    pointers[path] = pointer
+        return pointers
+
+    def hydrate(self):
+        """
+        按暂存区中的指针并行取回真实内容（只取缺失或过期的文件）
+        返回 (取回数, 跳过数, 失败信息列表)
+        """
+        pointers = self.pointer_entries()
+        pending = {path: oid for path, (oid, _) in pointers.items()
+                   if not (self.state.get(path, {}).get("oid") == oid and self.unchanged(path))}
+
+        def fetch(item):
+            path, oid = item
+            if not self.cache.has(oid):
+                tmp_path = self.cache.path_for(oid) + ".download"
+                os.makedirs(os.path.dirname(tmp_path), exist_ok=True)
+                self.store.get(oid, tmp_path)
+                actual, _ = hash_file(tmp_path)
+                if actual != oid:
+                    os.remove(tmp_path)
+                    raise RuntimeError(f"{path}: 内容校验失败")
+                os.replace(tmp_path, self.cache.path_for(oid))
+            target = self.full_path(path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            tmp_target = target + ".offload-tmp"
+            self.cache.get(oid, tmp_target)
+            os.replace(tmp_target, target)
+            return path, oid
+
+        def safe_fetch(item):
+            try:
+                return fetch(item), None
+            except Exception as e:
+                return None, f"{item[0]}: {e}"
+
+        fetched = 0
+        failures = []
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            for result, error in executor.map(safe_fetch, pending.items()):
+                if error:
+                    failures.append(error)
+                    continue
+                path, oid = result
+                _git(self.repo_path, ["update-index", "--skip-worktree", "--", path])
+                self.record(path, oid)
+                fetched += 1
+        # 指针已被移除（文件改回普通提交或被删除）的记录一并清理
+        for path in list(self.state):
+            if path not in pointers:
+                subprocess.run(["git", "update-index", "--no-skip-worktree", "--", path],
+                               cwd=self.repo_path, capture_output=True)
+                del self.state[path]
+        self.save_state()
+        return fetched, len(pointers) - len(pending), failures